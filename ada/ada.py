@@ -1,54 +1,227 @@
+import asyncio
+import hashlib
+import pkgutil
+import time
+import weakref
+
+from pulp.constants import LpStatusInfeasible, LpStatusOptimal, LpStatusUnbounded
+
 from .compare_recipe import CompareRecipeQuery, CompareRecipeResult
 from .compare_recipes_for import CompareRecipesForQuery
-from .db.db import DB
+from .db.snapshot import DBSnapshot
 from .help import HelpQuery, HelpResult
 from .info import InfoQuery, InfoResult
 from .optimization_query import OptimizationQuery
-from .optimizer import Optimizer
+from .optimizer import MODEL_VERSION, OptimizationResult, Optimizer
 from .query import Query
 from .query_parser import QueryParseException, QueryParser
 from .recipe_comparer import RecipeComparer
 from .result import ErrorResult, Result
+from .result_cache import ResultCache
+from .solution_store import SolutionStore, StoredSolution
+from .solver_pool import SolverPool, SolverPoolFullException
+from .sweep import ParametricSweeper
+
+# Only solves that reached a final answer are worth remembering.
+STORED_STATUSES = (LpStatusOptimal, LpStatusInfeasible, LpStatusUnbounded)
+
+
+class Generation:
+    # The game data and everything built from it. Ada builds a new generation when the game data is
+    # reloaded, queries always finish on the generation that parsed them. The solution store of a
+    # generation is closed once nothing uses the generation anymore.
+    def __init__(self, pool: SolverPool, purge_store: bool = True) -> None:
+        self.db = DBSnapshot().load()
+        start = time.perf_counter()
+        self.parser = QueryParser(self.db)
+        parsed = time.perf_counter()
+        self.opt = Optimizer(self.db, pool=pool)
+        print(
+            f"Built query parser in {1000 * (parsed - start):.0f} ms"
+            f" and optimizer in {1000 * (time.perf_counter() - parsed):.0f} ms"
+        )
+        self.recipe_comp = RecipeComparer(self.db, self.opt)
+        self.sweeper = ParametricSweeper(self.opt)
+        # Stored solutions are only valid for the game data and the model they were solved with.
+        self.solution_store = SolutionStore(f"{self.db.data_version()}:{MODEL_VERSION}", purge=purge_store)
+        weakref.finalize(self, self.solution_store.close)
+
+    def data_version(self) -> str:
+        return self.db.data_version()
+
+
+def _docs_version() -> str | None:
+    raw = pkgutil.get_data("ada.data", "Docs.json")
+    return hashlib.sha256(raw).hexdigest() if raw else None
 
 
 class Ada:
     def __init__(self) -> None:
-        self.__db = DB()
-        self.__parser = QueryParser(self.__db)
-        self.__opt = Optimizer(self.__db)
-        self.__recipe_comp = RecipeComparer(self.__db, self.__opt)
+        self.__pool = SolverPool()
+        self.__generation = Generation(self.__pool)
+        # The generation that parsed each query that is still around, e.g. one that a view edits and executes.
+        self.__query_generations: weakref.WeakKeyDictionary[Query, Generation] = weakref.WeakKeyDictionary()
+        # Keyed by data version and canonical query, so results of an older generation are never returned.
+        self.__result_cache: ResultCache[OptimizationResult] = ResultCache()
+        self.__reload_lock = asyncio.Lock()
+
+    def data_version(self) -> str:
+        return self.__generation.data_version()
+
+    # Builds a new generation from the current Docs.json in the background and swaps it in, queries that
+    # are already running finish on the old one. Returns a message describing the outcome.
+    async def reload(self) -> str:
+        async with self.__reload_lock:
+            old_version = self.__generation.data_version()
+            start = time.perf_counter()
+            try:
+                if await asyncio.to_thread(_docs_version) == old_version:
+                    elapsed = time.perf_counter() - start
+                    return f"Game data {old_version[:12]} is unchanged, checked in {elapsed:.1f}s"
+                # Solutions of the old generation are only purged on the next start, it is still in use.
+                generation = await asyncio.to_thread(Generation, self.__pool, False)
+            except Exception as error:
+                print(f"Failed to reload the game data: {error}")
+                return f"Failed to reload the game data, still using {old_version[:12]}: {error}"
+            elapsed = time.perf_counter() - start
+            if generation.data_version() == old_version:
+                return f"Game data {old_version[:12]} is unchanged, checked in {elapsed:.1f}s"
+            self.__generation = generation
+            print(f"Swapped game data {old_version[:12]} for {generation.data_version()[:12]}")
+            return f"Reloaded game data {old_version[:12]} -> {generation.data_version()[:12]} in {elapsed:.1f}s"
 
-    async def query(self, raw_query: str) -> Result:
+    async def query(self, raw_query: str, trace: bool = False) -> Result:
         try:
             query = self.parse(raw_query)
         except QueryParseException as parse_exception:
             return ErrorResult(str(parse_exception))
+        if trace and isinstance(query, OptimizationQuery):
+            query.enable_trace()
         return await self.execute(query)
 
     def parse(self, raw_query: str) -> Query:
+        generation = self.__generation
         print(f"Parsing raw query: {raw_query}\n")
-        query = self.__parser.parse(raw_query)
+        query = generation.parser.parse(raw_query)
         print(f"Parsed query: {query}\n")
+        self.__query_generations[query] = generation
         return query
 
     async def execute(self, query: Query) -> Result:
         print("Executing query: " + str(query) + "\n")
+        generation = self.__query_generations.get(query, self.__generation)
+        try:
+            return await self.__execute(generation, query)
+        except SolverPoolFullException as pool_exception:
+            return ErrorResult(str(pool_exception))
+
+    async def __execute(self, generation: Generation, query: Query) -> Result:
         if isinstance(query, HelpQuery):
             return HelpResult()
         if isinstance(query, OptimizationQuery):
-            return await self.__opt.optimize(query)
+            if query.range_element() is not None:
+                return await generation.sweeper.sweep(query)
+            return await self.__optimize(generation, query)
         if isinstance(query, InfoQuery):
             return InfoResult(query.vars, query.raw_query)
         if isinstance(query, CompareRecipesForQuery):
-            return await self.__recipe_comp.compare(query)
+            return await generation.recipe_comp.compare(query)
         if isinstance(query, CompareRecipeQuery):
             if len(query.recipe().products()) == 1:
                 product = next(iter(query.recipe().products().values()))
-                return await self.__recipe_comp.compare(
+                return await generation.recipe_comp.compare(
                     CompareRecipesForQuery(product.item(), query.include_alternates())
                 )
             return CompareRecipeResult(query)
         return ErrorResult("Unknown query.")
 
+    async def __optimize(self, generation: Generation, query: OptimizationQuery) -> Result:
+        result = await self.__find_result(generation, query)
+        if result is not None:
+            return result
+        result = await generation.opt.optimize(query)
+        await self.__remember_result(generation, query, result)
+        return result
+
+    # Parses and executes all queries, optimization queries that have not been solved before are solved
+    # together as one batch. Results are returned in the order of the queries.
+    async def query_many(self, raw_queries: list[str]) -> list[Result]:
+        generation = self.__generation
+        results: list[Result | None] = [None] * len(raw_queries)
+        unsolved: list[tuple[int, OptimizationQuery]] = []
+        for index, raw_query in enumerate(raw_queries):
+            try:
+                query = generation.parser.parse(raw_query)
+            except QueryParseException as parse_exception:
+                results[index] = ErrorResult(str(parse_exception))
+                continue
+            self.__query_generations[query] = generation
+            # Range queries are swept, which already solves all of their amounts as batches.
+            if isinstance(query, OptimizationQuery) and query.range_element() is None:
+                results[index] = await self.__find_result(generation, query)
+                if results[index] is None:
+                    unsolved.append((index, query))
+            else:
+                results[index] = await self.execute(query)
+
+        solved = await generation.opt.optimize_many([query for _, query in unsolved])
+        for (index, query), result in zip(unsolved, solved):
+            if isinstance(result, OptimizationResult):
+                await self.__remember_result(generation, query, result)
+            results[index] = result
+        return results
+
+    async def __find_result(self, generation: Generation, query: OptimizationQuery) -> OptimizationResult | None:
+        # A traced query is always solved again, the trace is the point of asking.
+        if query.trace():
+            return None
+        key = query.canonical_key()
+        result = self.__result_cache.get((generation.data_version(), key))
+        if result is not None:
+            print(f"Result cache hit ({self.__result_cache})")
+            return result
+        print(f"Result cache miss ({self.__result_cache})")
+
+        stored = await asyncio.to_thread(generation.solution_store.get, key)
+        if stored is None:
+            return None
+        print("Found stored solution")
+        result = generation.opt.restore_result(
+            query,
+            stored.status,
+            stored.objective_value,
+            stored.values,
+            stored.row_duals,
+            stored.reduced_costs,
+            stored.mip_gap,
+        )
+        self.__result_cache.put((generation.data_version(), key), result)
+        return result
+
+    async def __remember_result(
+            self, generation: Generation, query: OptimizationQuery, result: OptimizationResult
+    ) -> None:
+        # A solve that ran out of time may well succeed on a retry, so it is not remembered at all.
+        if result.status() not in STORED_STATUSES:
+            return
+        # Neither is the fallback to fractional buildings of a whole building solve that ran out of time.
+        if result.relaxed():
+            return
+        key = query.canonical_key()
+        self.__result_cache.put((generation.data_version(), key), result)
+        solution = result.solution()
+        stored = StoredSolution(
+            result.status(),
+            solution.objective_value(),
+            solution.nonzero_values(),
+            solution.nonzero_row_duals() if solution.has_sensitivity() else None,
+            solution.nonzero_reduced_costs() if solution.has_sensitivity() else None,
+            result.mip_gap(),
+        )
+        await asyncio.to_thread(generation.solution_store.put, key, stored)
+
+    def result_cache(self) -> ResultCache[OptimizationResult]:
+        return self.__result_cache
+
     def lookup(self, var: str):
-        return self.__db.lookup(var)
+        return self.__generation.db.lookup(var)
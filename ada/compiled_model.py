@@ -0,0 +1,250 @@
+import math
+
+import numpy as np
+
+INFINITY = math.inf
+
+
+class CompiledModel:
+    # A sparse template of the optimization model. Columns are the problem variables and rows are
+    # linear expressions stored in compressed sparse row form:
+    #   row_lower[i] <= sum(row_coeffs[k] * column[row_cols[k]]) <= row_upper[i]
+    # for k in row_starts[i]:row_starts[i + 1]. The template is built once and never modified
+    # afterwards, queries work on a ModelInstance instead.
+    def __init__(self) -> None:
+        self.__columns: list[str] = []
+        self.__column_index: dict[str, int] = {}
+        self.__col_lower: list[float] = []
+        self.__col_upper: list[float] = []
+
+        self.__rows: list[str] = []
+        self.__row_index: dict[str, int] = {}
+        self.__row_starts: list[int] = [0]
+        self.__row_cols: list[int] = []
+        self.__row_coeffs: list[float] = []
+        self.__row_lower: list[float] = []
+        self.__row_upper: list[float] = []
+        self.__column_rows: list[list[tuple[int, float]]] | None = None
+
+    def add_column(self, name: str, lower: float = -INFINITY, upper: float = INFINITY) -> int:
+        if name in self.__column_index:
+            raise ValueError(f"Duplicate column {name}")
+        self.__column_index[name] = len(self.__columns)
+        self.__columns.append(name)
+        self.__col_lower.append(lower)
+        self.__col_upper.append(upper)
+        return self.__column_index[name]
+
+    def add_row(self, name: str, coeffs: dict[str, float], lower: float = 0, upper: float = 0) -> int:
+        for column, coeff in coeffs.items():
+            # Zero coefficients would only be in the way of presolve, e.g. as the last term of a row.
+            if coeff == 0:
+                continue
+            self.__row_cols.append(self.__column_index[column])
+            self.__row_coeffs.append(coeff)
+        self.__row_index[name] = len(self.__rows)
+        self.__rows.append(name)
+        self.__row_starts.append(len(self.__row_cols))
+        self.__row_lower.append(lower)
+        self.__row_upper.append(upper)
+        return len(self.__rows) - 1
+
+    def set_lower(self, name: str, lower: float) -> None:
+        self.__col_lower[self.__column_index[name]] = lower
+
+    def columns(self) -> list[str]:
+        return self.__columns
+
+    def column(self, name: str) -> int:
+        return self.__column_index[name]
+
+    def has_column(self, name: str) -> bool:
+        return name in self.__column_index
+
+    def num_columns(self) -> int:
+        return len(self.__columns)
+
+    def col_lower(self) -> list[float]:
+        return self.__col_lower
+
+    def col_upper(self) -> list[float]:
+        return self.__col_upper
+
+    def rows(self) -> list[str]:
+        return self.__rows
+
+    def row_index(self, name: str) -> int:
+        return self.__row_index[name]
+
+    def num_rows(self) -> int:
+        return len(self.__rows)
+
+    def row_starts(self) -> list[int]:
+        return self.__row_starts
+
+    def row_cols(self) -> list[int]:
+        return self.__row_cols
+
+    def row_coeffs(self) -> list[float]:
+        return self.__row_coeffs
+
+    def row_lower(self) -> list[float]:
+        return self.__row_lower
+
+    def row_upper(self) -> list[float]:
+        return self.__row_upper
+
+    def row(self, row: int) -> tuple[list[int], list[float]]:
+        start = self.__row_starts[row]
+        end = self.__row_starts[row + 1]
+        return self.__row_cols[start:end], self.__row_coeffs[start:end]
+
+    # The rows each column appears in together with its coefficient, i.e. the transpose of the rows.
+    def column_rows(self) -> list[list[tuple[int, float]]]:
+        if self.__column_rows is None:
+            column_rows = [[] for _ in self.__columns]
+            for row in range(len(self.__rows)):
+                for k in range(self.__row_starts[row], self.__row_starts[row + 1]):
+                    column_rows[self.__row_cols[k]].append((row, self.__row_coeffs[k]))
+            self.__column_rows = column_rows
+        return self.__column_rows
+
+    def instance(self) -> "ModelInstance":
+        return ModelInstance(self)
+
+
+class ModelInstance:
+    # A per-query overlay on top of a CompiledModel. Only the column bounds and the objective are
+    # copied, the rows are shared with the template.
+    def __init__(self, model: CompiledModel) -> None:
+        self.__model = model
+        self.__col_lower = list(model.col_lower())
+        self.__col_upper = list(model.col_upper())
+        self.__objective: dict[int, float] = {}
+        self.__maximize = False
+        self.__integer: set[int] = set()
+
+    def model(self) -> CompiledModel:
+        return self.__model
+
+    def copy(self) -> "ModelInstance":
+        instance = ModelInstance(self.__model)
+        instance.__col_lower = list(self.__col_lower)
+        instance.__col_upper = list(self.__col_upper)
+        instance.__objective = dict(self.__objective)
+        instance.__maximize = self.__maximize
+        instance.__integer = set(self.__integer)
+        return instance
+
+    def col_lower(self) -> list[float]:
+        return self.__col_lower
+
+    def col_upper(self) -> list[float]:
+        return self.__col_upper
+
+    def objective(self) -> dict[int, float]:
+        return self.__objective
+
+    def is_maximize(self) -> bool:
+        return self.__maximize
+
+    def set_maximize(self, maximize: bool = True) -> None:
+        self.__maximize = maximize
+
+    def clear_objective(self) -> None:
+        self.__objective = {}
+
+    def add_objective(self, name: str, coeff: float) -> None:
+        column = self.__model.column(name)
+        self.__objective[column] = self.__objective.get(column, 0) + coeff
+
+    # Tightens the bounds of a column, equivalent to adding 'lower <= column <= upper' as a constraint.
+    def restrict(self, name: str, lower: float = -INFINITY, upper: float = INFINITY) -> None:
+        column = self.__model.column(name)
+        self.__col_lower[column] = max(self.__col_lower[column], lower)
+        self.__col_upper[column] = min(self.__col_upper[column], upper)
+
+    def fix(self, name: str, value: float) -> None:
+        self.restrict(name, value, value)
+
+    # Columns that may only take whole values, which turns the instance into a MIP.
+    def integer_columns(self) -> set[int]:
+        return self.__integer
+
+    def set_integer(self, name: str) -> None:
+        self.__integer.add(self.__model.column(name))
+
+    # Drops all integer requirements, leaving the LP relaxation of the instance.
+    def relax(self) -> None:
+        self.__integer = set()
+
+
+def _read_only(values: list[float]) -> np.ndarray:
+    array = np.array(values, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+def _nonzero(names: list[str], values: np.ndarray) -> dict[str, float]:
+    return {names[index]: float(values[index]) for index in np.flatnonzero(values)}
+
+
+class SolutionSnapshot:
+    # An immutable copy of the column values of a single solve, indexed by model column. Results only
+    # read from the snapshot, so they are isolated from any other solve that reuses the model.
+    # Row duals (indexed by model row) and reduced costs (indexed by model column) are only available
+    # for optimal solutions.
+    def __init__(
+            self,
+            model: CompiledModel,
+            values: list[float],
+            objective_value: float | None,
+            row_duals: list[float] | None = None,
+            reduced_costs: list[float] | None = None,
+    ) -> None:
+        self.__model = model
+        self.__values = _read_only(values)
+        self.__objective_value = objective_value
+        self.__row_duals = _read_only(row_duals) if row_duals is not None else None
+        self.__reduced_costs = _read_only(reduced_costs) if reduced_costs is not None else None
+
+    def model(self) -> CompiledModel:
+        return self.__model
+
+    def value(self, name: str) -> float:
+        return float(self.__values[self.__model.column(name)])
+
+    # The value of every model column, read-only.
+    def values(self) -> np.ndarray:
+        return self.__values
+
+    def nonzero_values(self) -> dict[str, float]:
+        return _nonzero(self.__model.columns(), self.__values)
+
+    def objective_value(self) -> float | None:
+        return self.__objective_value
+
+    def has_sensitivity(self) -> bool:
+        return self.__row_duals is not None and self.__reduced_costs is not None
+
+    # The change of the objective value per unit the row bounds are raised.
+    def row_dual(self, name: str) -> float:
+        return float(self.__row_duals[self.__model.row_index(name)])
+
+    # The change of the objective value per unit the column is raised.
+    def reduced_cost(self, name: str) -> float:
+        return float(self.__reduced_costs[self.__model.column(name)])
+
+    # Row duals indexed by model row, read-only.
+    def row_duals(self) -> np.ndarray:
+        return self.__row_duals
+
+    # Reduced costs indexed by model column, read-only.
+    def reduced_costs(self) -> np.ndarray:
+        return self.__reduced_costs
+
+    def nonzero_row_duals(self) -> dict[str, float]:
+        return _nonzero(self.__model.rows(), self.__row_duals)
+
+    def nonzero_reduced_costs(self) -> dict[str, float]:
+        return _nonzero(self.__model.columns(), self.__reduced_costs)
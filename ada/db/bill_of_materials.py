@@ -0,0 +1,161 @@
+import numpy as np
+
+from .item import Item
+from .recipe import Recipe
+from .recipe_matrix import RecipeMatrix
+
+PACKAGER = "crafter:packager"
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class BillOfMaterials:
+    # The raw resources and power it takes to make one of each item with the default recipes, built
+    # when the DB is loaded.
+    #
+    # The default recipe of an item is a recipe crafted in a building that is not an alternate, preferring
+    # the one named after the item and otherwise any that is not a packager recipe. Items without a default
+    # recipe (resources, and e.g. items only gathered by hand) are raw: one of them costs itself.
+    # Byproducts are not credited, every item is made as if its recipe made nothing else.
+    #
+    # Items are visited in topological order of their default recipes, ingredients before the items made
+    # from them. Items whose recipes form a cycle are solved together as a linear system, a cycle that
+    # cannot sustain itself leaves those items, and everything made from them, without a bill.
+    def __init__(self, items: dict[str, Item], recipes: dict[str, Recipe], matrix: RecipeMatrix) -> None:
+        self.__items = items
+        self.__matrix = matrix
+        item_count = len(matrix.item_vars())
+        ingredient_rates = matrix.ingredient_rates()
+        product_rates = matrix.product_rates()
+
+        # Item index => recipe index of its default recipe.
+        self.__default_recipes = {}
+        for item_var, item in items.items():
+            if item.is_resource():
+                continue
+            candidates = [
+                recipe for recipe in (
+                    recipes[matrix.recipe_vars()[index]]
+                    for index in np.flatnonzero(product_rates[matrix.item_index(item_var)])
+                )
+                if recipe.is_craftable_in_building() and not recipe.is_alternate()
+            ]
+            if not candidates:
+                continue
+            recipe = min(
+                candidates,
+                key=lambda candidate: (candidate.slug() != item.slug(), candidate.crafter().var() == PACKAGER)
+            )
+            self.__default_recipes[matrix.item_index(item_var)] = matrix.recipe_index(recipe.var())
+
+        # Ingredients and power per unit of each item made with its default recipe.
+        per_unit = np.zeros((item_count, item_count))
+        own_power = np.zeros(item_count)
+        for item, recipe in self.__default_recipes.items():
+            per_unit[item] = ingredient_rates[:, recipe] / product_rates[item, recipe]
+            own_power[item] = matrix.power_consumption()[recipe] / product_rates[item, recipe]
+
+        resources = np.zeros((item_count, item_count))
+        power = np.zeros(item_count)
+        known = np.zeros(item_count, dtype=bool)
+        for component in self.__components(per_unit):
+            if component[0] not in self.__default_recipes:
+                resources[component[0], component[0]] = 1.0
+                known[component[0]] = True
+                continue
+            ingredients = np.setdiff1d(np.flatnonzero(per_unit[component].any(axis=0)), component)
+            if not known[ingredients].all():
+                continue
+            # x = A x + b for the items of the component, with A the ingredients they use of each other.
+            external = per_unit[np.ix_(component, ingredients)]
+            component_resources = external @ resources[ingredients]
+            component_power = own_power[component] + external @ power[ingredients]
+            cycle = per_unit[np.ix_(component, component)]
+            if cycle.any():
+                system = np.eye(len(component)) - cycle
+                try:
+                    component_resources = np.linalg.solve(system, component_resources)
+                    component_power = np.linalg.solve(system, component_power)
+                except np.linalg.LinAlgError:
+                    continue
+                if np.any(component_resources < 0) or np.any(component_power < 0):
+                    continue
+            resources[component] = component_resources
+            power[component] = component_power
+            known[component] = True
+
+        self.__resources = _read_only(resources)
+        self.__power = _read_only(power)
+        self.__known = _read_only(known)
+
+    # Strongly connected components of the graph from each item to the ingredients of its default recipe,
+    # with Tarjan's algorithm, which finds them ingredients first.
+    @staticmethod
+    def __components(per_unit: np.ndarray) -> list[list[int]]:
+        ingredients = [np.flatnonzero(row).tolist() for row in per_unit]
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        components = []
+
+        def visit(item: int) -> None:
+            index[item] = low[item] = len(index)
+            stack.append(item)
+            on_stack.add(item)
+            for ingredient in ingredients[item]:
+                if ingredient not in index:
+                    visit(ingredient)
+                    low[item] = min(low[item], low[ingredient])
+                elif ingredient in on_stack:
+                    low[item] = min(low[item], index[ingredient])
+            if low[item] == index[item]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.remove(member)
+                    component.append(member)
+                    if member == item:
+                        break
+                components.append(sorted(component))
+
+        for item in range(len(ingredients)):
+            if item not in index:
+                visit(item)
+        return components
+
+    # Item var => recipe var of the default recipe of every item that has one.
+    def default_recipes(self) -> dict[str, str]:
+        item_vars = self.__matrix.item_vars()
+        recipe_vars = self.__matrix.recipe_vars()
+        return {item_vars[item]: recipe_vars[recipe] for item, recipe in self.__default_recipes.items()}
+
+    # Item x item amount of each raw item in one of each item, read-only. Rows of items without a bill
+    # are zero.
+    def resources(self) -> np.ndarray:
+        return self.__resources
+
+    # Power in MW to make each item at a rate of one per minute, read-only.
+    def power(self) -> np.ndarray:
+        return self.__power
+
+    def has_bill(self, item_var: str) -> bool:
+        return bool(self.__known[self.__matrix.item_index(item_var)])
+
+    # Raw item var => (item, amount) in one of the item, None if the item has no bill.
+    def item_resources(self, item_var: str) -> dict[str, tuple[Item, float]] | None:
+        if not self.has_bill(item_var):
+            return None
+        item_vars = self.__matrix.item_vars()
+        row = self.__resources[self.__matrix.item_index(item_var)]
+        return {
+            item_vars[index]: (self.__items[item_vars[index]], float(row[index])) for index in np.flatnonzero(row)
+        }
+
+    def item_power(self, item_var: str) -> float | None:
+        if not self.has_bill(item_var):
+            return None
+        return float(self.__power[self.__matrix.item_index(item_var)])
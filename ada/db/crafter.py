@@ -5,33 +5,39 @@ from ..utils import image_fetcher
 
 
 class Crafter(Entity):
+    __slots__ = ("__var", "__class_name", "__human_readable_name", "__description", "__power_consumption")
+
     def __init__(self, data: Dict[str, str]) -> None:
-        self.__data = data
+        self.__var = "crafter:" + data["mDisplayName"].lower().replace(" ", "-")
+        self.__class_name = data["ClassName"]
+        self.__human_readable_name = data["mDisplayName"]
+        self.__description = data["mDescription"]
+        self.__power_consumption = float(data["mPowerConsumption"])
 
     def var(self) -> str:
-        return "crafter:" + self.__data["mDisplayName"].lower().replace(" ", "-")
+        return self.__var
 
     def class_name(self) -> str:
-        return self.__data["ClassName"]
+        return self.__class_name
 
     def human_readable_name(self) -> str:
-        return self.__data["mDisplayName"]
+        return self.__human_readable_name
 
     def human_readable_underscored(self):
         return self.human_readable_name().replace(" ", "_")
 
     def description(self):
-        return self.__data["mDescription"]
+        return self.__description
 
     def power_consumption(self) -> float:
-        return float(self.__data["mPowerConsumption"])
+        return self.__power_consumption
 
     def details(self):
         out = [
             self.human_readable_name(),
             "  var: " + self.var(),
             "  power consumption: " + str(self.power_consumption()) + " MW",
-            self.__data["mDescription"],
+            self.__description,
             ""
         ]
         return "\n".join(out)
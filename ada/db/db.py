@@ -1,16 +1,20 @@
 # JSON data should be copied from {Install Directory}\CommunityResources\Docs\Docs.json
 # into data\Docs.json
 
-import json
+import hashlib
 import pkgutil
 
+from .bill_of_materials import BillOfMaterials
 from .crafter import Crafter
+from .docs_reader import read_native_classes
 from .entity import Entity
 from .extractor import Extractor
 from .item import Item
 from .power_generator import PowerGenerator
 from .power_recipe import PowerRecipe
+from .reachability import RecipeReachability
 from .recipe import Recipe
+from .recipe_matrix import RecipeMatrix
 
 RESOURCE_CLASSES = [
     "FGResourceDescriptor",
@@ -41,20 +45,22 @@ GENERATOR_CLASSES = [
 RECIPE_CLASSES = [
     "FGRecipe",
 ]
+NATIVE_CLASSES = (
+        RESOURCE_CLASSES + ITEM_CLASSES + CRAFTER_CLASSES + EXTRACTOR_CLASSES + GENERATOR_CLASSES + RECIPE_CLASSES
+)
 
 
 class DB:
-    def __init__(self):
+    def __init__(self, raw: bytes | None = None):
         # Parse data file
-        raw = pkgutil.get_data("ada.data", "Docs.json")
+        if raw is None:
+            raw = pkgutil.get_data("ada.data", "Docs.json")
         if not raw:
             raise FileNotFoundError("Cannot find data file 'data/Docs.json'")
-        data = json.loads(raw)
-
-        native_classes = {}
-        for native_class in data:
-            native_class_name = native_class["NativeClass"].split(".")[-1][:-1]
-            native_classes[native_class_name] = native_class["Classes"]
+        # Identifies the loaded game data, anything derived from it can be keyed on this.
+        self.__data_version = hashlib.sha256(raw).hexdigest()
+        # Only the native classes that are used are decoded, the rest of the file is skipped.
+        native_classes = dict(read_native_classes(raw, set(NATIVE_CLASSES)))
 
         self.__items = {}
         self.__item_var_from_class_name = {}
@@ -103,11 +109,19 @@ class DB:
                     extractor.class_name()
                 ] = extractor.var()
 
+        # Index the parsed items and crafters once, so that looking them up while building the generators
+        # and recipes does not scan all of them every time.
+        items_by_class_name = {item.class_name(): item for item in self.__items.values()}
+        items_by_native_class_name = {}
+        for item in self.__items.values():
+            items_by_native_class_name.setdefault(item.native_class_name(), []).append(item)
+        crafters_by_class_name = {crafter.class_name(): crafter for crafter in self.__crafters.values()}
+
         # Parse generators
         self.__generators = {}
         for generator_class in GENERATOR_CLASSES:
             for generator_data in native_classes[generator_class]:
-                generator = PowerGenerator(generator_data, self.__items.values())
+                generator = PowerGenerator(generator_data, items_by_class_name, items_by_native_class_name)
                 self.__generators[generator.var()] = generator
 
         # Parse recipes
@@ -118,9 +132,7 @@ class DB:
         self.__recipes = {}
         for recipe_class in RECIPE_CLASSES:
             for recipe_data in native_classes[recipe_class]:
-                recipe = Recipe(
-                    recipe_data, self.__items.values(), self.__crafters.values()
-                )
+                recipe = Recipe(recipe_data, items_by_class_name, crafters_by_class_name)
                 self.__recipes[recipe.var()] = recipe
                 for ingredient in recipe.ingredients().keys():
                     if ingredient not in self.__recipes_for_ingredient:
@@ -131,6 +143,10 @@ class DB:
                         self.__recipes_for_product[product] = []
                     self.__recipes_for_product[product].append(recipe)
 
+        self.__reachability = RecipeReachability(
+            self.__recipes, self.__recipes_for_product, self.__recipes_for_ingredient
+        )
+
         # Create power recipes
         self.__power_recipes = {}
         self.__power_recipes_by_fuel = {}
@@ -143,6 +159,13 @@ class DB:
                 self.__power_recipes[power_recipe.var()] = power_recipe
                 self.__power_recipes_by_fuel[fuel_item.var()] = power_recipe
 
+        self.__recipe_matrix = RecipeMatrix(self.__items, self.__recipes, self.__crafters, self.__generators)
+        self.__bill_of_materials = BillOfMaterials(self.__items, self.__recipes, self.__recipe_matrix)
+        for item_var, item in self.__items.items():
+            item.set_bill_of_materials(
+                self.__bill_of_materials.item_resources(item_var), self.__bill_of_materials.item_power(item_var)
+            )
+
         self.__all_entities = self.__items | self.__crafters | self.__extractors | self.__generators | self.__recipes \
                               | self.__power_recipes
 
@@ -152,6 +175,9 @@ class DB:
             print(f"Found duplicate item var {item.var()}, old {existing.class_name()}, new {item.class_name()}")
         self.__items[item.var()] = item
 
+    def data_version(self) -> str:
+        return self.__data_version
+
     def items(self):
         return self.__items
 
@@ -179,6 +205,15 @@ class DB:
             return []
         return self.__recipes_for_ingredient[ingredient]
 
+    def reachability(self) -> RecipeReachability:
+        return self.__reachability
+
+    def recipe_matrix(self) -> RecipeMatrix:
+        return self.__recipe_matrix
+
+    def bill_of_materials(self) -> BillOfMaterials:
+        return self.__bill_of_materials
+
     def power_recipes(self):
         return self.__power_recipes
 
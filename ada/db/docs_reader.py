@@ -0,0 +1,86 @@
+import json
+import re
+from typing import Iterator
+
+WHITESPACE = re.compile(r"\s*")
+
+
+def read_native_classes(raw: bytes, native_class_names: set[str]) -> Iterator[tuple[str, list[dict]]]:
+    # Reads Docs.json one native class at a time, yielding (native class name, classes) for the native
+    # classes in native_class_names only. The classes of every other native class are decoded one by one
+    # and dropped right away, so the whole file never exists as one object tree. Docs.json is a list of
+    # {"NativeClass": "Class'/Script/FactoryGame.<name>'", "Classes": [...]} objects.
+    reader = _Reader(raw.decode(json.detect_encoding(raw), "surrogatepass"))
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        native_class = reader.read_native_class(native_class_names)
+        if native_class is not None:
+            yield native_class
+        if reader.expect(",]") == "]":
+            return
+
+
+def native_class_name(raw_name: str) -> str:
+    return raw_name.split(".")[-1][:-1]
+
+
+class _Reader:
+    def __init__(self, text: str) -> None:
+        self.__text = text
+        self.__pos = 0
+        self.__decoder = json.JSONDecoder()
+
+    def peek(self) -> str:
+        self.__pos = WHITESPACE.match(self.__text, self.__pos).end()
+        return self.__text[self.__pos:self.__pos + 1]
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Expected one of '{characters}' at position {self.__pos} of Docs.json")
+        self.__pos += 1
+        return character
+
+    def decode(self):
+        self.peek()
+        value, self.__pos = self.__decoder.raw_decode(self.__text, self.__pos)
+        return value
+
+    # Skips a value, an array is decoded one element at a time and every element is dropped right away.
+    def skip(self) -> None:
+        if self.peek() != "[":
+            self.decode()
+            return
+        self.__pos += 1
+        if self.peek() == "]":
+            self.__pos += 1
+            return
+        while True:
+            self.decode()
+            if self.expect(",]") == "]":
+                return
+
+    def read_native_class(self, native_class_names: set[str]) -> tuple[str, list[dict]] | None:
+        name = None
+        classes = None
+        self.expect("{")
+        if self.peek() == "}":
+            self.__pos += 1
+            return None
+        while True:
+            key = self.decode()
+            self.expect(":")
+            if key == "NativeClass":
+                name = native_class_name(self.decode())
+            elif key == "Classes" and (name is None or name in native_class_names):
+                # The classes can only be skipped once the native class is known.
+                classes = self.decode()
+            else:
+                self.skip()
+            if self.expect(",}") == "}":
+                break
+        if name not in native_class_names or classes is None:
+            return None
+        return name, classes
@@ -5,39 +5,53 @@ from .entity import Entity
 
 
 class Extractor(Entity):
+    __slots__ = (
+        "__var",
+        "__class_name",
+        "__human_readable_name",
+        "__description",
+        "__power_consumption",
+        "__is_liquid_extractor",
+        "__minute_rate",
+    )
+
     def __init__(self, data: Dict[str, str]) -> None:
-        self.__data = data
+        self.__var = "extractor:" + data["mDisplayName"].lower().replace(" ", "-")
+        self.__class_name = data["ClassName"]
+        self.__human_readable_name = data["mDisplayName"]
+        self.__description = data["mDescription"]
+        self.__power_consumption = float(data["mPowerConsumption"])
+        self.__is_liquid_extractor = "RF_LIQUID" in data["mAllowedResourceForms"]
+        raw_minute_rate = (
+                60
+                * float(data["mItemsPerCycle"])
+                / float(data["mExtractCycleTime"])
+        )
+        self.__minute_rate = raw_minute_rate / 1000 if self.__is_liquid_extractor else raw_minute_rate
 
     def var(self) -> str:
-        return "extractor:" + self.__data["mDisplayName"].lower().replace(" ", "-")
+        return self.__var
 
     def class_name(self) -> str:
-        return self.__data["ClassName"]
+        return self.__class_name
 
     def human_readable_name(self) -> str:
-        return self.__data["mDisplayName"]
+        return self.__human_readable_name
 
     def human_readable_underscored(self):
         return self.human_readable_name().replace(" ", "_")
 
     def description(self):
-        return self.__data["mDescription"]
+        return self.__description
 
     def power_consumption(self) -> float:
-        return float(self.__data["mPowerConsumption"])
+        return self.__power_consumption
 
     def minute_rate(self) -> float:
-        raw_minute_rate = (
-                60
-                * float(self.__data["mItemsPerCycle"])
-                / float(self.__data["mExtractCycleTime"])
-        )
-        if self.is_liquid_extractor():
-            return raw_minute_rate / 1000
-        return raw_minute_rate
+        return self.__minute_rate
 
     def is_liquid_extractor(self) -> bool:
-        return "RF_LIQUID" in self.__data["mAllowedResourceForms"]
+        return self.__is_liquid_extractor
 
     def details(self):
         out = [
@@ -45,7 +59,7 @@ class Extractor(Entity):
             "  var: " + self.var(),
             "  power consumption: " + str(self.power_consumption()) + " MW",
             "  extraction rate: " + str(self.minute_rate()) + "/min",
-            self.__data["mDescription"],
+            self.__description,
             ""
         ]
         return "\n".join(out)
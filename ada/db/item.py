@@ -14,34 +14,78 @@ STACK_SIZES = {
 
 
 class Item(Entity):
+    # Everything derived from the raw data is computed once here, the raw data itself is not kept.
+    __slots__ = (
+        "__class_name",
+        "__native_class_name",
+        "__is_resource",
+        "__slug",
+        "__var",
+        "__viz_name",
+        "__human_readable_name",
+        "__description",
+        "__energy_value",
+        "__stack_size",
+        "__sink_value",
+        "__is_liquid",
+        "__raw_resources",
+        "__power",
+    )
+
     def __init__(
             self, data: Dict[str, str], native_class_name: str, is_resource: bool
     ) -> None:
-        self.__data = data
+        self.__class_name = data["ClassName"]
         self.__native_class_name = native_class_name
         self.__is_resource = is_resource
-
-    def slug(self) -> str:
-        display_name = self.__data["mDisplayName"]
+        self.__slug = self.__parse_slug(data)
+        self.__var = "item:" + self.__slug
+        self.__viz_name = "item-" + self.__slug
+        self.__human_readable_name = self.__parse_human_readable_name(data)
+        self.__description = data["mDescription"]
+        self.__is_liquid = data["mForm"] == "RF_LIQUID"
+        self.__energy_value = float(data["mEnergyValue"]) * (1000 if self.__is_liquid else 1)
+        self.__stack_size = STACK_SIZES.get(data["mStackSize"], -1)
+        if data["mStackSize"].isdigit():
+            self.__stack_size = int(data["mStackSize"])
+        self.__sink_value = int(data["mResourceSinkPoints"]) if "mResourceSinkPoints" in data else None
+        self.__raw_resources: dict[str, tuple["Item", float]] | None = None
+        self.__power: float | None = None
+
+    @staticmethod
+    def __parse_slug(data: Dict[str, str]) -> str:
+        display_name = data["mDisplayName"]
         if display_name:
-            slug = self.__data["mDisplayName"].lower().replace(" ", "-")
+            slug = display_name.lower().replace(" ", "-")
         else:
-            slug = self.class_name().removesuffix("_C").removeprefix("Build_").replace("_", "-")
+            slug = data["ClassName"].removesuffix("_C").removeprefix("Build_").replace("_", "-")
             slug = re.sub(r'(?<!^)(?=[A-Z])', '-', slug).lower()
             slug = re.sub(r'\-+', '-', slug)
         return slug
 
+    @staticmethod
+    def __parse_human_readable_name(data: Dict[str, str]) -> str:
+        display_name = data["mDisplayName"]
+        if not display_name:
+            display_name = data["ClassName"].removesuffix("_C").removeprefix("Desc_").replace("_", " ")
+            display_name = re.sub(r'(?<!^)(?=[A-Z])', ' ', display_name)
+            display_name = re.sub(r' +', ' ', display_name)
+        return "".join(i for i in display_name if ord(i) < 128)
+
+    def slug(self) -> str:
+        return self.__slug
+
     def var(self) -> str:
-        return "item:" + self.slug()
+        return self.__var
 
     def class_name(self) -> str:
-        return self.__data["ClassName"]
+        return self.__class_name
 
     def native_class_name(self) -> str:
         return self.__native_class_name
 
     def viz_name(self) -> str:
-        return "item-" + self.slug()
+        return self.__viz_name
 
     def viz_label(self, amount: float) -> str:
         color = "moccasin" if amount < 0 else "lightblue"
@@ -61,39 +105,42 @@ class Item(Entity):
         return out
 
     def human_readable_name(self) -> str:
-        display_name = self.__data["mDisplayName"]
-        if not display_name:
-            display_name = self.class_name().removesuffix("_C").removeprefix("Desc_").replace("_", " ")
-            display_name = re.sub(r'(?<!^)(?=[A-Z])', ' ', display_name)
-            display_name = re.sub(r' +', ' ', display_name)
-        return "".join(i for i in display_name if ord(i) < 128)
+        return self.__human_readable_name
 
     def human_readable_underscored(self) -> str:
         return self.human_readable_name().replace(" ", "_")
 
     def energy_value(self) -> float:
-        if self.is_liquid():
-            return float(self.__data["mEnergyValue"]) * 1000
-        return float(self.__data["mEnergyValue"])
+        return self.__energy_value
 
     def stack_size(self) -> int:
-        if self.__data["mStackSize"].isdigit():
-            return int(self.__data["mStackSize"])
-        if self.__data["mStackSize"] in STACK_SIZES:
-            return STACK_SIZES[self.__data["mStackSize"]]
-        return -1
+        return self.__stack_size
 
     def sink_value(self) -> Optional[int]:
-        return int(self.__data["mResourceSinkPoints"]) if "mResourceSinkPoints" in self.__data else None
+        return self.__sink_value
 
     def is_resource(self) -> bool:
         return self.__is_resource
 
+    # The raw resources in one of the item and the power in MW to make it at one per minute, with the
+    # default recipes, see BillOfMaterials.
+    def set_bill_of_materials(
+            self, raw_resources: dict[str, tuple["Item", float]] | None, power: float | None
+    ) -> None:
+        self.__raw_resources = raw_resources
+        self.__power = power
+
+    def raw_resources(self) -> dict[str, tuple["Item", float]] | None:
+        return self.__raw_resources
+
+    def production_power(self) -> float | None:
+        return self.__power
+
     def is_liquid(self) -> bool:
-        return self.__data["mForm"] == "RF_LIQUID"
+        return self.__is_liquid
 
     def description(self):
-        return self.__data["mDescription"]
+        return self.__description
 
     def details(self):
         out = [
@@ -116,10 +163,17 @@ class Item(Entity):
         return image_fetcher.fetch_first_on_page(self.wiki())
 
     def fields(self) -> list[tuple[str, str]]:
-        return [
+        fields = [
             ("Stack Size", str(self.stack_size())),
             ("Sink Value", str(self.sink_value())),
         ]
+        if self.__raw_resources and self.var() not in self.__raw_resources:
+            raw_resources = "\n".join(
+                [f"{round(amount, 2)} {item.human_readable_name()}" for item, amount in self.__raw_resources.values()]
+            )
+            fields.append(("Raw Resources", raw_resources))
+            fields.append(("Power at 1/m", f"{round(self.__power, 2)} MW"))
+        return fields
 
     # def embed(self) -> discord.Embed:
     #     embed = discord.Embed(title=self.human_readable_name())
@@ -6,54 +6,69 @@ from ..utils import image_fetcher
 
 
 class PowerGenerator(Entity):
-    def __init__(self, data, items):
-        self.__data = data
+    __slots__ = (
+        "__var",
+        "__class_name",
+        "__human_readable_name",
+        "__description",
+        "__power_production",
+        "__requires_water",
+        "__water_minute_rate",
+        "__fuel_items",
+    )
+
+    def __init__(
+            self, data, items_by_class_name: dict[str, Item], items_by_native_class_name: dict[str, list[Item]]
+    ) -> None:
+        self.__var = "generator:" + data["mDisplayName"].lower().replace(" ", "-")
+        self.__class_name = data["ClassName"]
+        self.__human_readable_name = data["mDisplayName"]
+        self.__description = data["mDescription"]
+        self.__power_production = float(data["mPowerProduction"])
+        self.__requires_water = data.get("mRequiresSupplementalResource") == "True"
+        self.__water_minute_rate = (
+                60 * self.__power_production * float(data.get("mSupplementalToPowerRatio", 0)) / 1000
+        )
         self.__fuel_items = []
         if "mDefaultFuelClasses" not in data:
             return
         for fuel_class in data["mDefaultFuelClasses"][1:-1].split(","):
             fuel_class_short = fuel_class.split(".")[-1][:-1]
-            fuel_items = [
-                item for item in items if item.native_class_name() == fuel_class_short
-            ]
+            fuel_items = items_by_native_class_name.get(fuel_class_short, [])
             if fuel_items:
                 # This fuel class is something generic, like 'FGItemDescriptorBiomass' which describes
                 # all biomass items.
                 self.__fuel_items.extend(fuel_items)
-            else:
+            elif fuel_class_short in items_by_class_name:
                 # This fuel class is a specific item, so find it by its class name.
-                for item in items:
-                    if item.class_name() == fuel_class_short:
-                        self.__fuel_items.append(item)
+                self.__fuel_items.append(items_by_class_name[fuel_class_short])
 
     def var(self) -> str:
-        return "generator:" + self.__data["mDisplayName"].lower().replace(" ", "-")
+        return self.__var
 
     def class_name(self) -> str:
-        return self.__data["ClassName"]
+        return self.__class_name
 
     def human_readable_name(self):
-        return self.__data["mDisplayName"]
+        return self.__human_readable_name
 
     def human_readable_underscored(self):
         return self.human_readable_name().replace(" ", "_")
 
     def description(self):
-        return self.__data["mDescription"]
+        return self.__description
 
     def power_production(self) -> float:
-        return float(self.__data["mPowerProduction"])
+        return self.__power_production
 
     def fuel_items(self) -> List[Union[Any, Item]]:
         return self.__fuel_items
 
     def requires_water(self) -> bool:
-        if "mRequiresSupplementalResource" not in self.__data:
-            return False
-        return self.__data["mRequiresSupplementalResource"] == "True"
+        return self.__requires_water
 
     def water_minute_rate(self) -> float:
-        return 60 * self.power_production() * float(self.__data["mSupplementalToPowerRatio"]) / 1000
+        return self.__water_minute_rate
 
     def details(self):
         out = [
@@ -64,7 +79,7 @@ class PowerGenerator(Entity):
         ]
         for fuel_item in self.__fuel_items:
             out.append("    " + fuel_item.human_readable_name())
-        out.append(self.__data["mDescription"])
+        out.append(self.__description)
         out.append("")
         return "\n".join(out)
 
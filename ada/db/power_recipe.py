@@ -4,17 +4,27 @@ from .power_generator import PowerGenerator
 
 
 class PowerRecipe(Entity):
+    __slots__ = ("__fuel_item", "__generator", "__var", "__viz_name", "__fuel_minute_rate")
 
     def __init__(self, fuel_item: Item, generator: PowerGenerator) -> None:
         # item var => recipe item
         self.__fuel_item = fuel_item
         self.__generator = generator
+        self.__var = "power-recipe:" + fuel_item.slug()
+        self.__viz_name = "power-recipe-" + fuel_item.slug()
+        # Example:
+        # 75 MW power production from generator
+        # = 75 MJ/s
+        # = 75 * 60 = 4500 MJ/m
+        # 300 MJ energy value of coal
+        # 4500 MJ/m / 300 MJ/coal = 15 coal/m
+        self.__fuel_minute_rate = generator.power_production() * 60 / fuel_item.energy_value()
 
     def var(self) -> str:
-        return "power-recipe:" + self.__fuel_item.slug()
+        return self.__var
 
     def viz_name(self) -> str:
-        return "power-recipe-" + self.__fuel_item.slug()
+        return self.__viz_name
 
     def viz_label(self, amount: float) -> str:
         out = "<"
@@ -55,15 +65,7 @@ class PowerRecipe(Entity):
         return "\n".join(out)
 
     def fuel_minute_rate(self) -> float:
-        # Example:
-        # 75 MW power production from generator
-        # = 75 MJ/s
-        # = 75 * 60 = 4500 MJ/m
-        # 300 MJ energy value of coal
-        # 4500 MJ/m / 300 MJ/coal = 15 coal/m
-        return (
-                self.__generator.power_production() * 60 / self.__fuel_item.energy_value()
-        )
+        return self.__fuel_minute_rate
 
     def water_minute_rate(self) -> float:
         return self.__generator.water_minute_rate()
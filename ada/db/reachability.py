@@ -0,0 +1,85 @@
+from .recipe import Recipe
+
+PACKAGER = "crafter:packager"
+WATER = "item:water"
+
+
+class RecipeReachability:
+    # Precomputed item <-> recipe reachability. Recipe sets are stored as bitsets (python ints) indexed by
+    # the position of the recipe in recipe_vars(), so the recipes connecting an input to an output are
+    # found with a single intersection instead of a search over the recipe graph.
+    #
+    # The graph goes from an item to the recipes that produce it and from a recipe to its ingredients.
+    # Packager recipes are left out so they are not used to connect inputs and outputs, and water is
+    # never traversed since almost everything could be connected through it.
+    def __init__(
+            self,
+            recipes: dict[str, Recipe],
+            recipes_for_product: dict[str, list[Recipe]],
+            recipes_for_ingredient: dict[str, list[Recipe]],
+    ) -> None:
+        self.__recipe_vars = list(recipes.keys())
+        self.__recipe_bits = {recipe_var: 1 << index for index, recipe_var in enumerate(self.__recipe_vars)}
+
+        def usable(recipe: Recipe) -> bool:
+            return not (recipe.is_craftable_in_building() and recipe.crafter().var() == PACKAGER)
+
+        producers = {
+            item_var: [recipe for recipe in item_recipes if usable(recipe)]
+            for item_var, item_recipes in recipes_for_product.items()
+        }
+        consumers = {
+            item_var: [recipe for recipe in item_recipes if usable(recipe)]
+            for item_var, item_recipes in recipes_for_ingredient.items()
+            if item_var != WATER
+        }
+        items = set(recipes_for_product.keys()) | set(recipes_for_ingredient.keys())
+
+        # item var => recipes that can take part in producing the item
+        self.__producing = {
+            item_var: self.__closure(item_var, producers, lambda recipe: recipe.ingredients().keys())
+            for item_var in items
+        }
+        # item var => recipes that the item can take part in, directly or through their products
+        self.__consuming = {
+            item_var: self.__closure(item_var, consumers, lambda recipe: recipe.products().keys())
+            for item_var in items
+        }
+
+    def __closure(self, item_var: str, edges: dict[str, list[Recipe]], next_items) -> int:
+        bits = 0
+        visited = {item_var}
+        pending = [item_var]
+        while pending:
+            for recipe in edges.get(pending.pop(), []):
+                recipe_bit = self.__recipe_bits[recipe.var()]
+                if bits & recipe_bit:
+                    continue
+                bits |= recipe_bit
+                for next_item in next_items(recipe):
+                    if next_item == WATER or next_item in visited:
+                        continue
+                    visited.add(next_item)
+                    pending.append(next_item)
+        return bits
+
+    def recipe_vars(self) -> list[str]:
+        return self.__recipe_vars
+
+    def recipe_bit(self, recipe_var: str) -> int:
+        return self.__recipe_bits[recipe_var]
+
+    def producing_recipes(self, item_var: str) -> int:
+        return self.__producing.get(item_var, 0)
+
+    def consuming_recipes(self, item_var: str) -> int:
+        return self.__consuming.get(item_var, 0)
+
+    # Returns the recipes on any path from the output down to the input.
+    def connecting_recipes(self, input_var: str, output_var: str) -> int:
+        if input_var == output_var:
+            return 0
+        return self.producing_recipes(output_var) & self.consuming_recipes(input_var)
+
+    def is_connected(self, input_var: str, output_var: str) -> bool:
+        return input_var == output_var or self.connecting_recipes(input_var, output_var) != 0
@@ -23,10 +23,13 @@ def parse_recipe_item(raw: str) -> Tuple[str, int]:
 
 
 class RecipeItem:
+    __slots__ = ("__item", "__amount", "__time", "__minute_rate")
+
     def __init__(self, item: Item, amount: int, time: float) -> None:
         self.__item = item
         self.__amount = amount
         self.__time = time
+        self.__minute_rate = 60 * amount / time
 
     def item(self) -> Item:
         return self.__item
@@ -35,7 +38,7 @@ class RecipeItem:
         return self.__amount
 
     def minute_rate(self) -> float:
-        return 60 * self.amount() / self.__time
+        return self.__minute_rate
 
     def human_readable_name(self):
         return (
@@ -44,49 +47,66 @@ class RecipeItem:
 
 
 class Recipe(Entity):
-    def __init__(self, data: Dict[str, str], items, crafters) -> None:
-        self.__data = data
+    __slots__ = (
+        "__slug",
+        "__var",
+        "__viz_name",
+        "__human_readable_name",
+        "__duration",
+        "__is_alternate",
+        "__crafter",
+        "__ingredients",
+        "__products",
+    )
+
+    def __init__(
+            self, data: Dict[str, str], items_by_class_name: Dict[str, Item], crafters_by_class_name: Dict[str, Crafter]
+    ) -> None:
+        display_name = data["mDisplayName"]
+        self.__slug = display_name.lower().replace(" ", "-").replace(":", "")
+        self.__var = "recipe:" + self.__slug
+        self.__viz_name = "recipe-" + self.__slug
+        self.__human_readable_name = "Recipe: " + display_name
+        self.__duration = float(data["mManufactoringDuration"])
+        self.__is_alternate = display_name.startswith("Alternate: ")
         self.__crafter = None
         producers = parse_list(data["mProducedIn"])
         for producer in producers:
             if len(producer) == 0:
                 continue
             producer_class_name = producer.split(".")[-1][:-1]
-            for crafter in crafters:
-                if crafter.class_name() == producer_class_name:
-                    self.__crafter = crafter
-                    break
+            if producer_class_name in crafters_by_class_name:
+                self.__crafter = crafters_by_class_name[producer_class_name]
 
         # item var => recipe item
         self.__ingredients = {}
         self.__products = {}
+        duration = self.__duration
         for ingredient in parse_list(data["mIngredients"]):
             class_name, amount = parse_recipe_item(ingredient)
-            for item in items:
-                if item.class_name() != class_name:
-                    continue
-                if item.is_liquid():
-                    amount = int(amount / 1000)
-                duration = float(data["mManufactoringDuration"])
-                self.__ingredients[item.var()] = RecipeItem(item, amount, duration)
+            if class_name not in items_by_class_name:
+                continue
+            item = items_by_class_name[class_name]
+            if item.is_liquid():
+                amount = int(amount / 1000)
+            self.__ingredients[item.var()] = RecipeItem(item, amount, duration)
         for product in parse_list(data["mProduct"]):
             class_name, amount = parse_recipe_item(product)
-            for item in items:
-                if item.class_name() != class_name:
-                    continue
-                if item.is_liquid():
-                    amount = int(amount / 1000)
-                duration = float(data["mManufactoringDuration"])
-                self.__products[item.var()] = RecipeItem(item, amount, duration)
+            if class_name not in items_by_class_name:
+                continue
+            item = items_by_class_name[class_name]
+            if item.is_liquid():
+                amount = int(amount / 1000)
+            self.__products[item.var()] = RecipeItem(item, amount, duration)
 
     def slug(self) -> str:
-        return self.__data["mDisplayName"].lower().replace(" ", "-").replace(":", "")
+        return self.__slug
 
     def var(self) -> str:
-        return "recipe:" + self.slug()
+        return self.__var
 
     def viz_name(self) -> str:
-        return "recipe-" + self.slug()
+        return self.__viz_name
 
     def viz_label(self, amount: float) -> str:
         num_buildings = math.ceil(amount)
@@ -142,7 +162,7 @@ class Recipe(Entity):
         return out
 
     def human_readable_name(self) -> str:
-        return "Recipe: " + self.__data["mDisplayName"]
+        return self.__human_readable_name
 
     def description(self):
         return ""
@@ -151,7 +171,7 @@ class Recipe(Entity):
         out = [
             self.human_readable_name(),
             "  var: " + self.var(),
-            "  time: " + str(float(self.__data["mManufactoringDuration"])) + "s",
+            "  time: " + str(self.__duration) + "s",
             "  crafted in: " + self.crafter().human_readable_name() if self.is_craftable_in_building() else "None",
             "  ingredients:"
         ]
@@ -179,7 +199,7 @@ class Recipe(Entity):
         return self.__crafter
 
     def is_alternate(self) -> bool:
-        return self.__data["mDisplayName"].startswith("Alternate: ")
+        return self.__is_alternate
 
     def is_craftable_in_building(self) -> bool:
         return self.__crafter is not None
@@ -194,6 +214,6 @@ class Recipe(Entity):
         return [
             ("Ingredients", ingredients),
             ("Products", products),
-            ("Crafting Time", str(float(self.__data["mManufactoringDuration"])) + " seconds"),
+            ("Crafting Time", str(self.__duration) + " seconds"),
             ("Building", self.crafter().human_readable_name() if self.is_craftable_in_building() else "None")
         ]
@@ -0,0 +1,104 @@
+import numpy as np
+
+from .crafter import Crafter
+from .item import Item
+from .power_generator import PowerGenerator
+from .recipe import Recipe
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class RecipeMatrix:
+    # The recipes of the DB as dense item x recipe matrices of ingredient and product rates per minute,
+    # for linear algebra over all recipes at once. Items, recipes, crafters and generators are indexed
+    # in DB order, every array is built when the DB is loaded and read-only afterwards.
+    def __init__(
+            self,
+            items: dict[str, Item],
+            recipes: dict[str, Recipe],
+            crafters: dict[str, Crafter],
+            generators: dict[str, PowerGenerator],
+    ) -> None:
+        self.__item_vars = list(items)
+        self.__item_index = {var: index for index, var in enumerate(self.__item_vars)}
+        self.__recipe_vars = list(recipes)
+        self.__recipe_index = {var: index for index, var in enumerate(self.__recipe_vars)}
+        self.__crafter_vars = list(crafters)
+        self.__crafter_index = {var: index for index, var in enumerate(self.__crafter_vars)}
+        self.__generator_vars = list(generators)
+        self.__generator_index = {var: index for index, var in enumerate(self.__generator_vars)}
+
+        ingredient_rates = np.zeros((len(items), len(recipes)))
+        product_rates = np.zeros((len(items), len(recipes)))
+        # Crafter index of each recipe, -1 for recipes that are not crafted in a building.
+        recipe_crafters = np.full(len(recipes), -1, dtype=np.intp)
+        power_consumption = np.zeros(len(recipes))
+        for column, recipe in enumerate(recipes.values()):
+            for item_var, ingredient in recipe.ingredients().items():
+                ingredient_rates[self.__item_index[item_var], column] = ingredient.minute_rate()
+            for item_var, product in recipe.products().items():
+                product_rates[self.__item_index[item_var], column] = product.minute_rate()
+            if recipe.is_craftable_in_building():
+                recipe_crafters[column] = self.__crafter_index[recipe.crafter().var()]
+                power_consumption[column] = recipe.crafter().power_consumption()
+        self.__ingredient_rates = _read_only(ingredient_rates)
+        self.__product_rates = _read_only(product_rates)
+        self.__net_rates = _read_only(product_rates - ingredient_rates)
+        self.__recipe_crafters = _read_only(recipe_crafters)
+        self.__craftable = _read_only(recipe_crafters >= 0)
+        self.__power_consumption = _read_only(power_consumption)
+
+    def item_vars(self) -> list[str]:
+        return self.__item_vars
+
+    def item_index(self, var: str) -> int:
+        return self.__item_index[var]
+
+    def recipe_vars(self) -> list[str]:
+        return self.__recipe_vars
+
+    def recipe_index(self, var: str) -> int:
+        return self.__recipe_index[var]
+
+    def crafter_vars(self) -> list[str]:
+        return self.__crafter_vars
+
+    def crafter_index(self, var: str) -> int:
+        return self.__crafter_index[var]
+
+    def generator_vars(self) -> list[str]:
+        return self.__generator_vars
+
+    def generator_index(self, var: str) -> int:
+        return self.__generator_index[var]
+
+    # Item x recipe rate per minute at which one building running the recipe uses each item.
+    def ingredient_rates(self) -> np.ndarray:
+        return self.__ingredient_rates
+
+    # Item x recipe rate per minute at which one building running the recipe makes each item.
+    def product_rates(self) -> np.ndarray:
+        return self.__product_rates
+
+    # Products minus ingredients, the net rate per minute of each item for each recipe.
+    def net_rates(self) -> np.ndarray:
+        return self.__net_rates
+
+    def recipe_crafters(self) -> np.ndarray:
+        return self.__recipe_crafters
+
+    # Whether each recipe is crafted in a building, the other recipes are made by hand.
+    def craftable(self) -> np.ndarray:
+        return self.__craftable
+
+    # The power consumption of the crafter of each recipe, 0 for recipes made by hand.
+    def power_consumption(self) -> np.ndarray:
+        return self.__power_consumption
+
+    # Item var => rate per minute of the nonzero rates in a column of one of the matrices.
+    def column_rates(self, rates: np.ndarray, recipe_var: str) -> dict[str, float]:
+        column = rates[:, self.__recipe_index[recipe_var]]
+        return {self.__item_vars[row]: float(column[row]) for row in np.flatnonzero(column)}
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import pickle
+import pkgutil
+import time
+
+from .db import DB
+
+# Bump whenever the layout of the snapshot file changes. Changes to the DB and its entities are picked up
+# from the hash of their source files instead.
+SNAPSHOT_VERSION = 2
+
+
+# SHA-256 of the source files of the DB and its entities, so snapshots pickled by any other version of the
+# code are rebuilt instead of loaded.
+def _code_version() -> str:
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".py"):
+            continue
+        digest.update(name.encode())
+        with open(os.path.join(directory, name), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class DBSnapshot:
+    # A pickled copy of the fully built DB, including every index and precomputed matrix, so a restart
+    # does not have to parse Docs.json and build the DB again. The snapshot starts with a small header of
+    # the snapshot version, the hash of the code of the DB and the SHA-256 of the Docs.json it was built
+    # from, it is only used when all of them match and is rebuilt otherwise. An empty path disables the
+    # snapshot.
+    def __init__(self, path: str | None = None) -> None:
+        if path is None:
+            path = os.getenv("ADA_DB_SNAPSHOT", "output" + os.path.sep + "db.snapshot")
+        self.__path = path
+
+    def path(self) -> str:
+        return self.__path
+
+    def load(self) -> DB:
+        start = time.perf_counter()
+        raw = pkgutil.get_data("ada.data", "Docs.json")
+        if not raw:
+            raise FileNotFoundError("Cannot find data file 'data/Docs.json'")
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "code_version": _code_version(),
+            "data_version": hashlib.sha256(raw).hexdigest(),
+        }
+
+        db = self.__read(header)
+        if db is not None:
+            print(f"Loaded DB snapshot {self.__path} in {1000 * (time.perf_counter() - start):.0f} ms")
+            return db
+
+        db = DB(raw)
+        built = time.perf_counter()
+        print(f"Built DB from Docs.json in {1000 * (built - start):.0f} ms")
+        if self.__path and self.__write(header, db):
+            print(f"Wrote DB snapshot {self.__path} in {1000 * (time.perf_counter() - built):.0f} ms")
+        return db
+
+    def __read(self, header: dict) -> DB | None:
+        if not self.__path or not os.path.exists(self.__path):
+            return None
+        try:
+            with open(self.__path, "rb") as file:
+                if pickle.load(file) != header:
+                    print(f"DB snapshot {self.__path} is out of date, rebuilding it")
+                    return None
+                db = pickle.load(file)
+        except Exception as error:
+            print(f"Could not read DB snapshot {self.__path}, rebuilding it: {error}")
+            return None
+        return db if isinstance(db, DB) else None
+
+    # Writes to a temporary file first, so a crash or a concurrent start never leaves a partial snapshot.
+    # The snapshot is only an optimization, failing to write it never fails loading the DB.
+    def __write(self, header: dict, db: DB) -> bool:
+        temporary = f"{self.__path}.{os.getpid()}.tmp"
+        try:
+            if os.path.dirname(self.__path):
+                os.makedirs(os.path.dirname(self.__path), exist_ok=True)
+            with open(temporary, "wb") as file:
+                pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(db, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self.__path)
+        except Exception as error:
+            print(f"Could not write DB snapshot {self.__path}: {error}")
+            try:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+            except OSError:
+                pass
+            return False
+        return True
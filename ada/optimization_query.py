@@ -1,3 +1,4 @@
+import copy
 from typing import Callable, Generic, TypeVar
 
 from .query import Query
@@ -21,22 +22,60 @@ class AmountValue:
         return str(self.value)
 
 
+class RangeValue:
+    # A range of amounts that a sweep query solves for, 'start..stop step step'.
+    def __init__(self, start: float, stop: float, step: float | None = None):
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+    def __str__(self):
+        return f"{self.start}..{self.stop}"
+
+    def amounts(self) -> list[float]:
+        if not self.step:
+            return [self.start, self.stop]
+        amounts = []
+        amount = self.start
+        while amount < self.stop:
+            amounts.append(amount)
+            amount += self.step
+        amounts.append(self.stop)
+        return amounts
+
+
+def _value_key(value: AmountValue | MaximizeValue | AnyValue | RangeValue) -> tuple:
+    if isinstance(value, AmountValue):
+        return "amount", float(value.value)
+    if isinstance(value, RangeValue):
+        return "range", float(value.start), float(value.stop), value.step
+    if isinstance(value, MaximizeValue):
+        return "maximize",
+    return "any",
+
+
+def _element_str(value: AmountValue | MaximizeValue | AnyValue | RangeValue, var: str) -> str:
+    if isinstance(value, RangeValue) and value.step:
+        return f"{value} {var} step {value.step}"
+    return f"{value} {var}".strip()
+
+
 class Input:
-    def __init__(self, var: str, value: AmountValue | MaximizeValue | AnyValue):
+    def __init__(self, var: str, value: AmountValue | MaximizeValue | AnyValue | RangeValue):
         self.var = var
         self.value = value
 
     def __str__(self):
-        return f"{self.value} {self.var}".strip()
+        return _element_str(self.value, self.var)
 
 
 class Output:
-    def __init__(self, var: str, value: AmountValue | MaximizeValue | AnyValue):
+    def __init__(self, var: str, value: AmountValue | MaximizeValue | AnyValue | RangeValue):
         self.var = var
         self.value = value
 
     def __str__(self):
-        return f"{self.value} {self.var}".strip()
+        return _element_str(self.value, self.var)
 
 
 T = TypeVar("T")
@@ -79,6 +118,9 @@ class OptimizationQuery(Query):
         self.__inputs: dict[str, Category[Input]] = {}
         self.__outputs: Category[Output] = Category("output", False)
         self.__objective: Input | Output | None = None
+        self.__then_objectives: list[str] = []
+        self.__whole_buildings = False
+        self.__trace = False
 
     def objective(self) -> Input | Output | None:
         return self.__objective
@@ -86,6 +128,28 @@ class OptimizationQuery(Query):
     def has_objective(self) -> bool:
         return self.__objective is not None
 
+    # Vars that are maximized in order after the objective, each one without giving up on the optimum
+    # of the objectives before it. Like the objective, usage of an input is negative.
+    def then_objectives(self) -> list[str]:
+        return self.__then_objectives
+
+    def add_then_objective(self, var: str) -> None:
+        self.__then_objectives.append(var)
+
+    # Whether crafters and generators are counted in whole buildings instead of fractions of one.
+    def whole_buildings(self) -> bool:
+        return self.__whole_buildings
+
+    def set_whole_buildings(self, value: bool) -> None:
+        self.__whole_buildings = value
+
+    # Asks the optimizer to record a solver trace for this query.
+    def enable_trace(self) -> None:
+        self.__trace = True
+
+    def trace(self) -> bool:
+        return self.__trace
+
     def add_output(self, var: str, value: AmountValue | MaximizeValue | AnyValue = AnyValue(), strict: bool = False):
         print(f"Adding output, var={var}, amount={value}, strict={strict}")
         output = Output(var, value)
@@ -133,6 +197,23 @@ class OptimizationQuery(Query):
     def set_strict_outputs(self, value: bool) -> None:
         self.__outputs.strict = value
 
+    # The input or output whose amount is swept over a range, if any.
+    def range_element(self) -> Input | Output | None:
+        for output in self.__outputs.elements.values():
+            if isinstance(output.value, RangeValue):
+                return output
+        for category in self.__inputs.values():
+            for input_ in category.elements.values():
+                if isinstance(input_.value, RangeValue):
+                    return input_
+        return None
+
+    # A copy of this query with the swept range replaced by a single amount.
+    def with_amount(self, amount: float) -> "OptimizationQuery":
+        query = copy.deepcopy(self)
+        query.range_element().value = AmountValue(amount)
+        return query
+
     def has_power_output(self):
         return "power" in self.__outputs.elements
 
@@ -154,16 +235,43 @@ class OptimizationQuery(Query):
             if len(values) == 0:
                 continue
             inputs.append(f"{'only ' if category.strict else ''}{' and '.join([str(value) for value in values])}")
+        if self.__whole_buildings:
+            inputs.append("whole-buildings")
 
         parts = [f"produce {' and '.join(outputs)}"]
         if len(inputs) > 0:
             parts.append(f"from {' and '.join(inputs)}")
+        for then_var in self.__then_objectives:
+            parts.append(f"then ? {then_var}")
 
         return " ".join(parts)
 
     def print(self):
         print(self)
 
+    # A hashable form of the query that does not depend on the order in which inputs and outputs were
+    # added, so equivalent queries map to the same key.
+    def canonical_key(self) -> tuple:
+        inputs = tuple(
+            sorted(
+                (
+                    name,
+                    category.strict,
+                    tuple(sorted((var, _value_key(input_.value)) for var, input_ in category.elements.items())),
+                )
+                for name, category in self.__inputs.items()
+                if len(category.elements) > 0
+            )
+        )
+        outputs = (
+            self.__outputs.strict,
+            tuple(sorted((var, _value_key(output.value)) for var, output in self.__outputs.elements.items())),
+        )
+        objective = None
+        if self.__objective is not None:
+            objective = (type(self.__objective).__name__, self.__objective.var)
+        return inputs, outputs, objective, tuple(self.__then_objectives), self.__whole_buildings
+
     def query_vars(self) -> list[str]:
         query_vars = []
         if self.has_objective():
@@ -13,7 +13,9 @@ class OptimizationResultData:
             recipes: dict[str, tuple[Recipe, float]],
             crafters: dict[str, tuple[Crafter, float]],
             generators: dict[str, tuple[PowerGenerator, float]],
-            net_power: float
+            net_power: float,
+            shadow_prices: dict[str, float] | None = None,
+            reduced_costs: dict[str, float] | None = None
     ) -> None:
         self.__inputs = inputs
         self.__outputs = outputs
@@ -21,6 +23,8 @@ class OptimizationResultData:
         self.__crafters = crafters
         self.__generators = generators
         self.__net_power = net_power
+        self.__shadow_prices = shadow_prices
+        self.__reduced_costs = reduced_costs
 
     def inputs(self) -> dict[str, tuple[Item, float]]:
         return self.__inputs
@@ -39,3 +43,16 @@ class OptimizationResultData:
 
     def net_power(self) -> float:
         return self.__net_power
+
+    def has_sensitivity(self) -> bool:
+        return self.__shadow_prices is not None and self.__reduced_costs is not None
+
+    # Item var => change of the objective value for every extra unit per minute of the item that is
+    # available, e.g. the value of one more input. Items that are missing have a shadow price of 0.
+    def shadow_prices(self) -> dict[str, float]:
+        return self.__shadow_prices or {}
+
+    # Recipe var => change of the objective value for every extra recipe run per minute that is forced
+    # into the solution. Recipes that are missing have a reduced cost of 0.
+    def reduced_costs(self) -> dict[str, float]:
+        return self.__reduced_costs or {}
@@ -1,9 +1,12 @@
+import asyncio
+import math
 import os
-from typing import Dict
+import time
+from typing import TypeVar
+
+import numpy as np
 
-import pulp
 from graphviz import Digraph
-from pulp import PULP_CBC_CMD
 from pulp.constants import (
     LpStatusInfeasible,
     LpStatusNotSolved,
@@ -11,58 +14,110 @@ from pulp.constants import (
     LpStatusUnbounded,
     LpStatusUndefined,
 )
-from pulp.pulp import LpProblem, LpVariable
 
+from .compiled_model import CompiledModel, ModelInstance, SolutionSnapshot
 from .db.db import DB
 from .optimization_query import AmountValue, AnyValue, MaximizeValue, OptimizationQuery, Output
 from .optimization_result_data import OptimizationResultData
-from .result import Result
+from .presolve import ReducedProblem, presolve
+from .query_planner import CHAIN, LP, QueryPlanner
+from .result import ErrorResult, Result
+from .solver_backend import SolveControl, SolverBackend, create_backend
+from .solver_pool import SolverPool, SolverPoolFullException
+from .trace_recorder import SolveTrace, TraceRecorder
 
 EPSILON = 0.000001
+T = TypeVar("T")
+# Version of the compiled model, bump it whenever a change to the model changes the solution of any query,
+# so solutions stored by an older version are dropped.
+MODEL_VERSION = 3
+# Relative slack on the optimum of a lexicographic stage that later stages have to keep.
+STAGE_TOLERANCE = 0.00000001
+
+
+class EntityColumns:
+    # The model columns of the items, recipes, power recipes, crafters and generators of the DB, in DB
+    # order, so that a solution can be split up by type of entity with array operations.
+    def __init__(self, db: DB, model: CompiledModel) -> None:
+        self.items = list(db.items().values())
+        self.item_columns = np.array([model.column(item.var()) for item in self.items], dtype=np.intp)
+        self.item_rows = np.array([model.row_index(item.var()) for item in self.items], dtype=np.intp)
+        self.recipes = list(db.recipes().values())
+        self.recipe_columns = np.array([model.column(recipe.var()) for recipe in self.recipes], dtype=np.intp)
+        self.power_recipes = list(db.power_recipes().values())
+        self.power_recipe_columns = np.array(
+            [model.column(power_recipe.var()) for power_recipe in self.power_recipes], dtype=np.intp
+        )
+        self.crafters = list(db.crafters().values())
+        self.crafter_columns = np.array([model.column(crafter.var()) for crafter in self.crafters], dtype=np.intp)
+        self.generators = list(db.generators().values())
+        self.generator_columns = np.array(
+            [model.column(generator.var()) for generator in self.generators], dtype=np.intp
+        )
+        self.power_column = model.column(POWER)
+
+
+def _select(entities: list[T], values: np.ndarray, mask: np.ndarray) -> dict[str, tuple[T, float]]:
+    return {entities[index].var(): (entities[index], float(values[index])) for index in np.flatnonzero(mask)}
 
 
 class OptimizationResult(Result):
     def __init__(
             self,
             db: DB,
-            vars_: Dict[str, LpVariable],
-            prob: LpProblem,
+            columns: EntityColumns,
+            solution: SolutionSnapshot,
             status: int,
             query: OptimizationQuery,
+            mip_gap: float | None = None,
+            relaxed: bool = False,
+            plan: str = LP,
     ) -> None:
         self.__db = db
-        self.__prob = prob
-        self.__vars = vars_
+        self.__solution = solution
         self.__status = status
         self.__query = query
-        # Dictionaries from var -> (obj, value)
-        # TODO: Use these in the functions below
-        inputs = {
-            item.var(): (item, -self.__get_value(item.var()))
-            for item in self.__db.items().values()
-            if self.__has_value(item.var()) and self.__get_value(item.var()) < 0
-        }
-        outputs = {
-            item.var(): (item, self.__get_value(item.var()))
-            for item in self.__db.items().values()
-            if self.__has_value(item.var()) and self.__get_value(item.var()) > 0
-        }
-        recipes = {
-            recipe.var(): (recipe, self.__get_value(recipe.var()))
-            for recipe in self.__db.recipes().values()
-            if self.__has_value(recipe.var())
-        }
-        crafters = {
-            crafter.var(): (crafter, self.__get_value(crafter.var()))
-            for crafter in self.__db.crafters().values()
-            if self.__has_value(crafter.var())
-        }
-        generators = {
-            generator.var(): (generator, self.__get_value(generator.var()))
-            for generator in self.__db.generators().values()
-            if self.__has_value(generator.var())
-        }
-        net_power = self.__get_value("power") if self.__has_value("power") else 0
+        self.__mip_gap = mip_gap
+        self.__relaxed = relaxed
+        self.__plan = plan
+
+        # Every view of the solution is split off the values once here, dictionaries from
+        # var -> (obj, value) in DB order with only the values that are not zero.
+        values = solution.values()
+        self.__has_non_zero_var = bool(np.any(np.abs(values) > EPSILON))
+        item_values = values[columns.item_columns]
+        item_nonzero = np.abs(item_values) > EPSILON
+        self.__items = _select(columns.items, item_values, item_nonzero)
+        inputs = _select(columns.items, -item_values, item_nonzero & (item_values < 0))
+        outputs = _select(columns.items, item_values, item_nonzero & (item_values > 0))
+        recipe_values = values[columns.recipe_columns]
+        recipes = _select(columns.recipes, recipe_values, np.abs(recipe_values) > EPSILON)
+        # Recipe amounts in the column order of the recipe matrix of the DB.
+        self.__recipe_amounts = np.where(np.abs(recipe_values) > EPSILON, -recipe_values, 0.0)
+        power_recipe_values = values[columns.power_recipe_columns]
+        self.__power_recipes = _select(
+            columns.power_recipes, power_recipe_values, np.abs(power_recipe_values) > EPSILON
+        )
+        crafter_values = values[columns.crafter_columns]
+        crafters = _select(columns.crafters, crafter_values, np.abs(crafter_values) > EPSILON)
+        generator_values = values[columns.generator_columns]
+        generators = _select(columns.generators, generator_values, np.abs(generator_values) > EPSILON)
+        net_power = float(values[columns.power_column])
+        if abs(net_power) <= EPSILON:
+            net_power = 0
+        shadow_prices = None
+        reduced_costs = None
+        if self.__solution.has_sensitivity():
+            item_duals = self.__solution.row_duals()[columns.item_rows]
+            shadow_prices = {
+                var: dual for var, (_, dual) in _select(columns.items, item_duals, np.abs(item_duals) > EPSILON).items()
+            }
+            # Recipe variables are negative, running a recipe once more lowers its variable by one.
+            recipe_costs = -self.__solution.reduced_costs()[columns.recipe_columns]
+            reduced_costs = {
+                var: cost
+                for var, (_, cost) in _select(columns.recipes, recipe_costs, np.abs(recipe_costs) > EPSILON).items()
+            }
 
         self.__result_data = OptimizationResultData(
             inputs=inputs,
@@ -70,7 +125,9 @@ class OptimizationResult(Result):
             recipes=recipes,
             crafters=crafters,
             generators=generators,
-            net_power=net_power
+            net_power=net_power,
+            shadow_prices=shadow_prices,
+            reduced_costs=reduced_costs
         )
 
     def result_data(self) -> OptimizationResultData:
@@ -79,38 +136,43 @@ class OptimizationResult(Result):
     def success(self):
         return self.__status is LpStatusOptimal
 
+    def status(self) -> int:
+        return self.__status
+
     def query(self):
         return self.__query
 
-    def __has_value(self, var):
-        return (
-                self.__vars[var].value()
-                and abs(self.__vars[var].value()) > EPSILON
-        )
+    def solution(self) -> SolutionSnapshot:
+        return self.__solution
 
-    def __get_value(self, var):
-        return self.__vars[var].value()
-
-    def __get_vars(self, objs, check_value=lambda val: True, suffix=""):
-        out = []
-        for obj in objs:
-            var = obj.var()
-            if self.__has_value(var) and check_value(self.__get_value(var)):
-                out.append(
-                    obj.human_readable_name()
-                    + ": "
-                    + str(round(abs(self.__get_value(var)), 2))
-                    + suffix
-                )
-        return out
+    # The relative gap between the whole building solution and the best possible one that the solver
+    # proved, None if the buildings were not counted as whole buildings or the gap is unknown.
+    def mip_gap(self) -> float | None:
+        return self.__mip_gap
 
-    def __get_section(self, title, objs, check_value=lambda val: True, suffix=""):
-        out = [title]
-        vars_ = self.__get_vars(objs, check_value=check_value, suffix=suffix)
-        if len(vars_) == 0:
+    # Whether whole buildings were asked for but the solver ran out of time, so that the buildings are
+    # counted in fractions instead.
+    def relaxed(self) -> bool:
+        return self.__relaxed
+
+    # How the query planner answered the query, CHAIN if it was expanded without the LP.
+    def plan(self) -> str:
+        return self.__plan
+
+    def whole_buildings_note(self) -> str | None:
+        if self.__relaxed:
+            return "Ran out of time for whole buildings, building counts are fractions."
+        if self.__mip_gap is not None:
+            return f"Whole buildings within {round(self.__mip_gap * 100, 4)}% of the best possible solution."
+        return None
+
+    @staticmethod
+    def __get_section(title, values, suffix=""):
+        if len(values) == 0:
             return []
         out = [title]
-        out.extend(vars_)
+        for obj, value in values.values():
+            out.append(obj.human_readable_name() + ": " + str(round(abs(value), 2)) + suffix)
         out.append("")
         return out
 
@@ -119,40 +181,26 @@ class OptimizationResult(Result):
             str(self.__query),
             "=== OPTIMAL SOLUTION FOUND ===\n"
         ]
-        out.extend(
-            self.__get_section(
-                "INPUT",
-                self.__db.items().values(),
-                check_value=lambda val: val < 0,
-                suffix="/m",
-            )
-        )
-        out.extend(
-            self.__get_section(
-                "OUTPUT",
-                self.__db.items().values(),
-                check_value=lambda val: val > 0,
-                suffix="/m",
-            )
-        )
-        # out.extend(self.__get_section("INPUT", [item.input() for item in self.__db.items().values()]))
-        # out.extend(self.__get_section("OUTPUT", [item.output() for item in self.__db.items().values()]))
-        out.extend(self.__get_section("RECIPES", self.__db.recipes().values()))
-        out.extend(self.__get_section("CRAFTERS", self.__db.crafters().values()))
-        out.extend(self.__get_section("GENERATORS", self.__db.generators().values()))
+        result_data = self.__result_data
+        out.extend(self.__get_section("INPUT", result_data.inputs(), suffix="/m"))
+        out.extend(self.__get_section("OUTPUT", result_data.outputs(), suffix="/m"))
+        out.extend(self.__get_section("RECIPES", result_data.recipes()))
+        out.extend(self.__get_section("CRAFTERS", result_data.crafters()))
+        out.extend(self.__get_section("GENERATORS", result_data.generators()))
         out.append("NET POWER")
-        net_power = 0
-        if self.__has_value("power"):
-            net_power = self.__get_value("power")
-        out.append(str(net_power) + " MW")
+        out.append(str(result_data.net_power()) + " MW")
         out.append("")
         out.append("OBJECTIVE VALUE")
-        out.append(str(self.__prob.objective.value()))
+        out.append(str(self.__solution.objective_value()))
+        note = self.whole_buildings_note()
+        if note is not None:
+            out.append("")
+            out.append(note)
         return "\n".join(out)
 
     def __str__(self) -> str:
         if self.__status is LpStatusNotSolved:
-            return "No solution has been found."
+            return "No solution has been found in time, try a more specific query."
         if self.__status is LpStatusUndefined:
             return "No solution has been found."
         if self.__status is LpStatusInfeasible:
@@ -250,22 +298,13 @@ class OptimizationResult(Result):
     #     message.content = str(breadcrumbs)
     #     return message
 
-    def __add_nodes(self, s, objs):
-        for obj in objs:
-            var = obj.var()
-            if not self.__has_value(var):
-                continue
-            amount = abs(self.__get_value(var))
-            s.node(obj.viz_name(), obj.viz_label(amount), shape="plaintext")
-
-    def __has_non_zero_var(self):
-        for var in self.__vars:
-            if self.__has_value(var):
-                return True
-        return False
+    @staticmethod
+    def __add_nodes(s, values):
+        for obj, value in values.values():
+            s.node(obj.viz_name(), obj.viz_label(abs(value)), shape="plaintext")
 
     def has_solution(self) -> bool:
-        return self.__status is LpStatusOptimal and self.__has_non_zero_var()
+        return self.__status is LpStatusOptimal and self.__has_non_zero_var
 
     @staticmethod
     def __power_viz_label(output, net):
@@ -298,47 +337,40 @@ class OptimizationResult(Result):
             targets[item_var][target] = amount
 
         # items
-        self.__add_nodes(s, self.__db.items().values())
-        for item in self.__db.items().values():
-            if not self.__has_value(item.var()):
-                continue
-            amount = self.__get_value(item.var())
+        self.__add_nodes(s, self.__items)
+        for item, amount in self.__items.values():
             target = sources if amount < 0 else sinks
             add_to_target(
                 item.var(), target, item.viz_name(), abs(amount)
             )
         # recipes
-        self.__add_nodes(s, self.__db.recipes().values())
-        for recipe in self.__db.recipes().values():
-            if not self.__has_value(recipe.var()):
-                continue
-            recipe_amount = -self.__get_value(recipe.var())
-            for item_var, ingredient in recipe.ingredients().items():
-                ingredient_amount = recipe_amount * ingredient.minute_rate()
-                add_to_target(item_var, sinks, recipe.viz_name(), ingredient_amount)
-            for item_var, product in recipe.products().items():
-                product_amount = recipe_amount * product.minute_rate()
-                add_to_target(item_var, sources, recipe.viz_name(), product_amount)
+        self.__add_nodes(s, self.__result_data.recipes())
+        matrix = self.__db.recipe_matrix()
+        item_vars = matrix.item_vars()
+        recipes = list(self.__db.recipes().values())
+        # Recipe x item flows per minute of every recipe in the solution.
+        ingredient_flows = (matrix.ingredient_rates() * self.__recipe_amounts).T
+        product_flows = (matrix.product_rates() * self.__recipe_amounts).T
+        for column, row in zip(*np.nonzero(ingredient_flows)):
+            add_to_target(item_vars[row], sinks, recipes[column].viz_name(), float(ingredient_flows[column, row]))
+        for column, row in zip(*np.nonzero(product_flows)):
+            add_to_target(item_vars[row], sources, recipes[column].viz_name(), float(product_flows[column, row]))
         # power
         power_output = 0
-        net_power = 0
-        if self.__has_value("power"):
-            net_power = self.__get_value("power")
+        net_power = self.__result_data.net_power()
 
         def get_power_edge_label(power_production):
             return str(round(power_production, 2)) + " MW"
 
         # power recipes
-        self.__add_nodes(s, self.__db.power_recipes().values())
-        for power_recipe in self.__db.power_recipes().values():
-            if not self.__has_value(power_recipe.var()):
-                continue
+        self.__add_nodes(s, self.__power_recipes)
+        for power_recipe, power_recipe_value in self.__power_recipes.values():
             fuel_item = power_recipe.fuel_item()
-            fuel_amount = (self.__get_value(power_recipe.var()) * power_recipe.fuel_minute_rate())
+            fuel_amount = (power_recipe_value * power_recipe.fuel_minute_rate())
             add_to_target(fuel_item.var(), sinks, power_recipe.viz_name(), fuel_amount)
-            water_amount = (self.__get_value(power_recipe.var()) * power_recipe.water_minute_rate())
+            water_amount = (power_recipe_value * power_recipe.water_minute_rate())
             add_to_target("item:water", sinks, power_recipe.viz_name(), water_amount)
-            power_production = -(self.__get_value(power_recipe.var()) * power_recipe.power_production())
+            power_production = -(power_recipe_value * power_recipe.power_production())
             power_output += power_production
             s.edge(
                 power_recipe.viz_name(),
@@ -381,174 +413,254 @@ UNWEIGHTED_RESOURCES = "unweighted-resources"
 WEIGHTED_RESOURCES = "weighted-resources"
 MEAN_WEIGHTED_RESOURCES = "mean-weighted-resources"
 ALTERNATE_RECIPES = "alternate-recipes"
+BUILDINGS = "buildings"
+# Prefix of the columns and rows for the number of buildings each recipe and power recipe runs in.
+RECIPE_BUILDINGS = "buildings:"
+# Prefix of the columns for the unused capacity of the buildings of each recipe and power recipe.
+IDLE = "idle:"
 
 
 class Optimizer:
-    def __init__(self, db: DB, debug: bool = False) -> None:
+    def __init__(
+            self,
+            db: DB,
+            debug: bool = False,
+            pool: SolverPool | None = None,
+            backend: SolverBackend | None = None,
+            trace_recorder: TraceRecorder | None = None,
+            time_limit: float | None = None,
+            gap: float | None = None,
+    ) -> None:
+        if time_limit is None:
+            time_limit = float(os.getenv("ADA_SOLVER_TIME_LIMIT", 10))
+        if gap is None:
+            gap = float(os.getenv("ADA_SOLVER_GAP", 0.0001))
         self.__db = db
         self.__debug = debug
+        self.__pool = pool if pool else SolverPool()
+        self.__backend = backend if backend else create_backend()
+        self.__trace_recorder = trace_recorder if trace_recorder else TraceRecorder()
+        # Seconds each solve may take, 0 or less for no limit.
+        self.__time_limit = time_limit if time_limit > 0 else None
+        self.__gap = gap
+        print(f"Using the {self.__backend.name()} solver backend")
 
         self.variable_names = []
 
+        # Compile the item, crafter, generator, and power equations once into a sparse model template.
+        # Queries only apply bounds and an objective on top of a copy of the template.
+        self.__model = CompiledModel()
+
         # Create problem variables
-        self.__variables = {}
         for recipe in self.__db.recipes():
-            self.__variables[recipe] = pulp.LpVariable(recipe, upBound=0)
+            self.__model.add_column(recipe, upper=0)
         for power_recipe in self.__db.power_recipes():
-            self.__variables[power_recipe] = pulp.LpVariable(power_recipe, upBound=0)
+            self.__model.add_column(power_recipe, upper=0)
         for item in self.__db.items().values():
-            self.__variables[item.var()] = pulp.LpVariable(item.var())
+            self.__model.add_column(item.var())
         for crafter in self.__db.crafters():
-            self.__variables[crafter] = pulp.LpVariable(crafter, upBound=0)
+            self.__model.add_column(crafter, upper=0)
         for generator_var, generator in self.__db.generators().items():
-            self.__variables[generator_var] = pulp.LpVariable(generator_var, upBound=0)
-        self.__variables[POWER] = pulp.LpVariable(POWER)
-        self.__variables[UNWEIGHTED_RESOURCES] = pulp.LpVariable(UNWEIGHTED_RESOURCES)
-        self.__variables[WEIGHTED_RESOURCES] = pulp.LpVariable(WEIGHTED_RESOURCES)
-        self.__variables[MEAN_WEIGHTED_RESOURCES] = pulp.LpVariable(
-            MEAN_WEIGHTED_RESOURCES
-        )
-        self.__variables[ALTERNATE_RECIPES] = pulp.LpVariable(
-            ALTERNATE_RECIPES, upBound=0
-        )
-
-        self.__equalities = []
+            self.__model.add_column(generator_var, upper=0)
+        self.__model.add_column(POWER)
+        self.__model.add_column(UNWEIGHTED_RESOURCES)
+        self.__model.add_column(WEIGHTED_RESOURCES)
+        self.__model.add_column(MEAN_WEIGHTED_RESOURCES)
+        self.__model.add_column(ALTERNATE_RECIPES, upper=0)
+        self.__model.add_column(BUILDINGS, upper=0)
+
+        matrix = self.__db.recipe_matrix()
+        recipe_vars = matrix.recipe_vars()
+        craftable = matrix.craftable()
+        # Recipes and power recipes that run in a building. Unlike the recipes and the types of buildings,
+        # their building counts are positive: the MIP presolve of HiGHS loses the optimum on integer columns
+        # without a lower bound.
+        self.__building_recipes = [
+            *[recipe_vars[column] for column in np.flatnonzero(craftable)], *self.__db.power_recipes()
+        ]
+        for recipe_var in self.__building_recipes:
+            self.__model.add_column(RECIPE_BUILDINGS + recipe_var, lower=0)
+        # Only used by whole building queries, every other query fixes them to zero. At most one building
+        # of a recipe is partly idle.
+        for recipe_var in self.__building_recipes:
+            self.__model.add_column(IDLE + recipe_var, lower=0, upper=1)
 
         # For each item, create an equality for all inputs and outputs:
         #   products - ingredients = net output
         #   products - ingredients - net output = 0
         for item_var, item in self.__db.items().items():
-            var_coeff = {}  # variable => coefficient
-            recipes_for_item = self.__db.recipes_for_product(item_var)
-            recipes_from_item = self.__db.recipes_for_ingredient(item_var)
-            for recipe in recipes_for_item:
-                if not recipe.is_craftable_in_building():
-                    continue
-                var_coeff[self.__variables[recipe.var()]] = recipe.product(
-                    item_var
-                ).minute_rate()
-            for recipe in recipes_from_item:
-                if not recipe.is_craftable_in_building():
-                    continue
-                var_coeff[self.__variables[recipe.var()]] = -recipe.ingredient(
-                    item_var
-                ).minute_rate()
+            rates = matrix.net_rates()[matrix.item_index(item_var)]
+            # variable => coefficient
+            var_coeff = {
+                recipe_vars[column]: float(rates[column]) for column in np.flatnonzero(craftable & (rates != 0))
+            }
             if item_var in self.__db.power_recipes_by_fuel():
                 power_recipe = self.__db.power_recipes_by_fuel()[item_var]
-                var_coeff[
-                    self.__variables[power_recipe.var()]
-                ] = -power_recipe.fuel_minute_rate()
+                var_coeff[power_recipe.var()] = -power_recipe.fuel_minute_rate()
             if item_var == "item:water":
-                for generator in self.__db.generators().values():
-                    if generator.requires_water():
-                        var_coeff[
-                            self.__variables[generator.var()]
-                        ] = -generator.water_minute_rate()
-            var_coeff[self.__variables[item.var()]] = 1
-            # var_coeff[self.__variables[item.output().var()]] = -1
-            self.__equalities.append(pulp.LpAffineExpression(var_coeff) == 0)
-
-        # For each type of crafter, create an equality for all recipes that require it
+                for power_recipe in self.__db.power_recipes().values():
+                    if power_recipe.generator().requires_water():
+                        var_coeff[power_recipe.var()] = (
+                                var_coeff.get(power_recipe.var(), 0) - power_recipe.water_minute_rate()
+                        )
+            var_coeff[item.var()] = 1
+            self.__model.add_row(item_var, var_coeff)
+
+        # For each recipe and power recipe, create an equality for the buildings it runs in, where the
+        # last building may be partly idle:
+        #   recipe + buildings - idle buildings = 0
+        for recipe_var in self.__building_recipes:
+            self.__model.add_row(
+                RECIPE_BUILDINGS + recipe_var,
+                {recipe_var: 1, RECIPE_BUILDINGS + recipe_var: 1, IDLE + recipe_var: -1},
+            )
+
+        # For each type of crafter, create an equality for the buildings of all recipes that require it
         for crafter_var in self.__db.crafters():
-            var_coeff = {}  # variable => coefficient
-            for recipe_var, recipe in self.__db.recipes().items():
-                if not recipe.is_craftable_in_building():
-                    continue
-                if recipe.crafter().var() == crafter_var:
-                    var_coeff[self.__variables[recipe_var]] = 1
-            var_coeff[self.__variables[crafter_var]] = -1
-            self.__equalities.append(pulp.LpAffineExpression(var_coeff) == 0)
+            recipe_columns = np.flatnonzero(matrix.recipe_crafters() == matrix.crafter_index(crafter_var))
+            # variable => coefficient
+            var_coeff = {RECIPE_BUILDINGS + recipe_vars[column]: 1 for column in recipe_columns}
+            var_coeff[crafter_var] = 1
+            self.__model.add_row(crafter_var, var_coeff)
 
-        # For each type of generator, create an equality for power recipes that require it
+        # For each type of generator, create an equality for the buildings of power recipes that require it
         for generator_var in self.__db.generators():
             var_coeff = {}  # variable => coefficient
             for power_recipe_var, power_recipe in self.__db.power_recipes().items():
                 if power_recipe.generator().var() == generator_var:
-                    var_coeff[self.__variables[power_recipe_var]] = 1
-            var_coeff[self.__variables[generator_var]] = -1
-            self.__equalities.append(pulp.LpAffineExpression(var_coeff) == 0)
+                    var_coeff[RECIPE_BUILDINGS + power_recipe_var] = 1
+            var_coeff[generator_var] = 1
+            self.__model.add_row(generator_var, var_coeff)
 
-        # Create a single power equality for all crafters and generators
+        # Create a single power equality for all recipes and power recipes, idle buildings neither
+        # consume nor produce power.
         power_coeff = {}
-        for generator_var, generator in self.__db.generators().items():
-            power_coeff[self.__variables[generator_var]] = -generator.power_production()
-        for crafter_var, crafter in self.__db.crafters().items():
-            power_coeff[self.__variables[crafter_var]] = crafter.power_consumption()
-        power_coeff[self.__variables["power"]] = -1
-        self.__equalities.append(pulp.LpAffineExpression(power_coeff) == 0)
+        for power_recipe_var, power_recipe in self.__db.power_recipes().items():
+            power_coeff[power_recipe_var] = -power_recipe.power_production()
+        for column in np.flatnonzero(craftable):
+            power_coeff[recipe_vars[column]] = float(matrix.power_consumption()[column])
+        power_coeff[POWER] = -1
+        self.__model.add_row(POWER, power_coeff)
 
         unweighted_resources = {
-            self.__variables["item:water"]: 0,
-            self.__variables["item:iron-ore"]: 1,
-            self.__variables["item:copper-ore"]: 1,
-            self.__variables["item:limestone"]: 1,
-            self.__variables["item:coal"]: 1,
-            self.__variables["item:crude-oil"]: 1,
-            self.__variables["item:bauxite"]: 1,
-            self.__variables["item:caterium-ore"]: 1,
-            self.__variables["item:raw-quartz"]: 1,
-            self.__variables["item:sulfur"]: 1,
-            self.__variables["item:nitrogen-gas"]: 1,
-            self.__variables[UNWEIGHTED_RESOURCES]: -1,
+            "item:water": 0,
+            "item:iron-ore": 1,
+            "item:copper-ore": 1,
+            "item:limestone": 1,
+            "item:coal": 1,
+            "item:crude-oil": 1,
+            "item:bauxite": 1,
+            "item:caterium-ore": 1,
+            "item:raw-quartz": 1,
+            "item:sulfur": 1,
+            "item:nitrogen-gas": 1,
+            UNWEIGHTED_RESOURCES: -1,
         }
-        self.__equalities.append(pulp.LpAffineExpression(unweighted_resources) == 0)
+        self.__model.add_row(UNWEIGHTED_RESOURCES, unweighted_resources)
         # Proportional to amount of resource on map
         weighted_resources = {
-            self.__variables["item:water"]: 0,
-            self.__variables["item:iron-ore"]: 1,
-            self.__variables["item:copper-ore"]: 3.29,
-            self.__variables["item:limestone"]: 1.47,
-            self.__variables["item:coal"]: 2.95,
-            self.__variables["item:crude-oil"]: 4.31,
-            self.__variables["item:bauxite"]: 8.48,
-            self.__variables["item:caterium-ore"]: 6.36,
-            self.__variables["item:uranium"]: 46.67,
-            self.__variables["item:raw-quartz"]: 6.36,
-            self.__variables["item:sulfur"]: 13.33,
-            self.__variables["item:nitrogen-gas"]: 4.5,  # TODO
-            self.__variables[WEIGHTED_RESOURCES]: -1,
+            "item:water": 0,
+            "item:iron-ore": 1,
+            "item:copper-ore": 3.29,
+            "item:limestone": 1.47,
+            "item:coal": 2.95,
+            "item:crude-oil": 4.31,
+            "item:bauxite": 8.48,
+            "item:caterium-ore": 6.36,
+            "item:uranium": 46.67,
+            "item:raw-quartz": 6.36,
+            "item:sulfur": 13.33,
+            "item:nitrogen-gas": 4.5,  # TODO
+            WEIGHTED_RESOURCES: -1,
         }
-        self.__equalities.append(pulp.LpAffineExpression(weighted_resources) == 0)
+        self.__model.add_row(WEIGHTED_RESOURCES, weighted_resources)
         # Square root of weighted amounts above
         mean_weighted_resources = {
-            self.__variables["item:water"]: 0,
-            self.__variables["item:iron-ore"]: 1,
-            self.__variables["item:copper-ore"]: 1.81,
-            self.__variables["item:limestone"]: 1.21,
-            self.__variables["item:coal"]: 1.72,
-            self.__variables["item:crude-oil"]: 2.08,
-            self.__variables["item:bauxite"]: 2.91,
-            self.__variables["item:caterium-ore"]: 2.52,
-            self.__variables["item:uranium"]: 6.83,
-            self.__variables["item:raw-quartz"]: 2.52,
-            self.__variables["item:sulfur"]: 3.65,
-            self.__variables["item:nitrogen-gas"]: 2.2,  # TODO
-            self.__variables[MEAN_WEIGHTED_RESOURCES]: -1,
+            "item:water": 0,
+            "item:iron-ore": 1,
+            "item:copper-ore": 1.81,
+            "item:limestone": 1.21,
+            "item:coal": 1.72,
+            "item:crude-oil": 2.08,
+            "item:bauxite": 2.91,
+            "item:caterium-ore": 2.52,
+            "item:uranium": 6.83,
+            "item:raw-quartz": 2.52,
+            "item:sulfur": 3.65,
+            "item:nitrogen-gas": 2.2,  # TODO
+            MEAN_WEIGHTED_RESOURCES: -1,
         }
-        self.__equalities.append(pulp.LpAffineExpression(mean_weighted_resources) == 0)
+        self.__model.add_row(MEAN_WEIGHTED_RESOURCES, mean_weighted_resources)
 
         # Map resource limits
-        self.__equalities.append(self.__variables["item:iron-ore"] >= -70380)
-        self.__equalities.append(self.__variables["item:copper-ore"] >= -70380)
-        self.__equalities.append(self.__variables["item:limestone"] >= -70380)
-        self.__equalities.append(self.__variables["item:coal"] >= -70380)
-        self.__equalities.append(self.__variables["item:crude-oil"] >= -70380)
-        self.__equalities.append(self.__variables["item:bauxite"] >= -70380)
-        self.__equalities.append(self.__variables["item:caterium-ore"] >= -70380)
-        self.__equalities.append(self.__variables["item:uranium"] >= -70380)
-        self.__equalities.append(self.__variables["item:raw-quartz"] >= -70380)
-        self.__equalities.append(self.__variables["item:sulfur"] >= -70380)
-        self.__equalities.append(self.__variables["item:nitrogen-gas"] >= -70380)
+        self.__model.set_lower("item:iron-ore", -70380)
+        self.__model.set_lower("item:copper-ore", -70380)
+        self.__model.set_lower("item:limestone", -70380)
+        self.__model.set_lower("item:coal", -70380)
+        self.__model.set_lower("item:crude-oil", -70380)
+        self.__model.set_lower("item:bauxite", -70380)
+        self.__model.set_lower("item:caterium-ore", -70380)
+        self.__model.set_lower("item:uranium", -70380)
+        self.__model.set_lower("item:raw-quartz", -70380)
+        self.__model.set_lower("item:sulfur", -70380)
+        self.__model.set_lower("item:nitrogen-gas", -70380)
 
         alternate_coeffs = {}
         for recipe in self.__db.recipes().values():
             if recipe.is_alternate():
-                alternate_coeffs[self.__variables[recipe.var()]] = 1
-        alternate_coeffs[self.__variables[ALTERNATE_RECIPES]] = -1
-        self.__equalities.append(pulp.LpAffineExpression(alternate_coeffs) == 0)
+                alternate_coeffs[recipe.var()] = 1
+        alternate_coeffs[ALTERNATE_RECIPES] = -1
+        self.__model.add_row(ALTERNATE_RECIPES, alternate_coeffs)
+
+        # Total number of crafters and generators, negative like each of them
+        buildings_coeffs = {}
+        for crafter_var in self.__db.crafters():
+            buildings_coeffs[crafter_var] = 1
+        for generator_var in self.__db.generators():
+            buildings_coeffs[generator_var] = 1
+        buildings_coeffs[BUILDINGS] = -1
+        self.__model.add_row(BUILDINGS, buildings_coeffs)
+
+        self.__entity_columns = EntityColumns(self.__db, self.__model)
+        self.__planner = QueryPlanner(
+            self.__db, self.__model, {UNWEIGHTED_RESOURCES, WEIGHTED_RESOURCES, MEAN_WEIGHTED_RESOURCES}
+        )
+
+    def model(self) -> CompiledModel:
+        return self.__model
+
+    def planner(self) -> QueryPlanner:
+        return self.__planner
+
+    # Rebuilds a result from previously solved variable values, e.g. from the solution store.
+    def restore_result(
+            self,
+            query: OptimizationQuery,
+            status: int,
+            objective_value: float | None,
+            values: dict[str, float],
+            row_duals: dict[str, float] | None = None,
+            reduced_costs: dict[str, float] | None = None,
+            mip_gap: float | None = None,
+    ) -> OptimizationResult:
+        columns = [0.0] * self.__model.num_columns()
+        for var, value in values.items():
+            columns[self.__model.column(var)] = value
+        rows = None
+        if row_duals is not None:
+            rows = [0.0] * self.__model.num_rows()
+            for row_name, dual in row_duals.items():
+                rows[self.__model.row_index(row_name)] = dual
+        costs = None
+        if reduced_costs is not None:
+            costs = [0.0] * self.__model.num_columns()
+            for var, cost in reduced_costs.items():
+                costs[self.__model.column(var)] = cost
+        solution = SolutionSnapshot(self.__model, columns, objective_value, rows, costs)
+        return OptimizationResult(self.__db, self.__entity_columns, solution, status, query, mip_gap=mip_gap)
 
     def enable_related_recipes(
-            self, query: OptimizationQuery, prob: LpProblem, debug: bool = False
+            self, query: OptimizationQuery, instance: ModelInstance, debug: bool = False
     ) -> None:
         query_vars = query.query_vars()
         if UNWEIGHTED_RESOURCES in query_vars:
@@ -576,52 +688,11 @@ class Optimizer:
                 continue
             outputs.append(output_var)
 
-        # print("inputs:", inputs, "outputs:", outputs)
-
-        connected = set()
-
-        # If there is a path from var to the query_input_var, then add all
-        # connected recipes.
-
-        def check(input_var, var, connected: set, stack):
-            # print("Checking if", var, "is connected to", input_var)
-            if var == input_var:
-                if debug:
-                    print("Found connection!")
-                    print("  " + " -> ".join(reversed(stack)))
-                return True
-            # if var.startswith("resource:"):
-            #     return False
-            if len(self.__db.recipes_for_product(var)) == 0:
-                return False
-            is_var_connected = False
-            for recipe in self.__db.recipes_for_product(var):
-                # print("Checking recipe", recipe.var(), "for product", var)
-                if recipe.var() in connected:
-                    # print("Recipe already connected")
-                    is_var_connected = True
-                    continue
-                if recipe.var() in stack:
-                    # print("Recipe already in stack")
-                    continue
-                if recipe.is_craftable_in_building() and recipe.crafter().var() == "crafter:packager":
-                    # We don't want to use the packager recipes to find connections between inputs and outputs
-                    # print("Recipe not craftable in building or package recipe")
-                    continue
-                stack.append(recipe.var())
-                # print("Connected:", connected)
-                for ingredient in recipe.ingredients():
-                    stack.append(ingredient)
-                    if ingredient == "item:water":
-                        continue
-                    if check(input_var, ingredient, connected, stack):
-                        connected.update(stack)
-                        # print("Recipe", recipe.var(), "is connected, connected:", connected)
-                        is_var_connected = True
-                    stack.pop()
-                stack.pop()
-            return is_var_connected
+        reachability = self.__db.reachability()
+        connected = 0
+        connected_power_recipes = set()
 
+        # Enable every recipe on a path from an output down to an input.
         for input_var in inputs:
             if input_var == POWER:
                 # Nothing to do for power input
@@ -630,80 +701,67 @@ class Optimizer:
                 if output_var == POWER:
                     for power_recipe in self.__db.power_recipes().values():
                         fuel_var = power_recipe.fuel_item().var()
-                        stack = [fuel_var]
-                        if debug:
-                            print(
-                                "\nChecking connection from", input_var, "to", fuel_var
-                            )
-                        if check(input_var, fuel_var, connected, stack):
-                            if debug:
-                                print("enabling connected:", connected)
-                                print("enabling power recipe:", power_recipe.var())
-                            connected.add(power_recipe.var())
-
+                        if reachability.is_connected(input_var, fuel_var):
+                            connected |= reachability.connecting_recipes(input_var, fuel_var)
+                            connected_power_recipes.add(power_recipe.var())
                 else:
-                    stack = [output_var]
-                    if debug:
-                        print("\nChecking connection from", input_var, "to", output_var)
-                    if check(input_var, output_var, connected, stack):
-                        if debug:
-                            print("Found connection from", input_var, "to", output_var)
+                    connected |= reachability.connecting_recipes(input_var, output_var)
 
         if debug:
-            print("Connected:", connected)
+            print(
+                "Connected:",
+                [recipe_var for recipe_var in self.__db.recipes() if connected & reachability.recipe_bit(recipe_var)],
+                sorted(connected_power_recipes),
+            )
 
         # Disable any disconnected recipes.
         for recipe_var in self.__db.recipes():
-            if recipe_var not in connected:
-                prob += self.__variables[recipe_var] == 0
+            if not connected & reachability.recipe_bit(recipe_var):
+                instance.fix(recipe_var, 0)
         for power_recipe_var in self.__db.power_recipes():
-            if power_recipe_var not in connected:
-                # print("disabling power recipe", power_recipe_var)
-                prob += self.__variables[power_recipe_var] == 0
+            if power_recipe_var not in connected_power_recipes:
+                instance.fix(power_recipe_var, 0)
 
     async def optimize(self, query: OptimizationQuery) -> OptimizationResult:
         if self.__debug:
             print("called optimize() with query:\n\n" + str(query) + "\n")
+        if query.range_element() is not None:
+            # The amount of a range is only decided by the sweeper, see with_amount().
+            raise ValueError(f"Cannot optimize {query} for a whole range of amounts, sweep it instead")
+
+        instance = self.instance(query)
+
+        # Presolve, planning and solving run on the solver pool so the event loop is not blocked.
+        # Cancelling the caller, e.g. when the interaction the query came from expires, stops the solve.
+        control = SolveControl(self.__time_limit, self.__gap)
+        return await self.__pool.run(self.__solve, instance, query, control, on_cancel=control.cancel)
+
+    # The model with the bounds and the objective of the query.
+    def instance(self, query: OptimizationQuery) -> ModelInstance:
+        instance = self.__model.instance()
 
         # TODO: Always max since inputs are negative?
         if isinstance(query.objective(), Output):
-            prob = pulp.LpProblem("max-problem", pulp.LpMaximize)
-        else:
-            prob = pulp.LpProblem("min-problem", pulp.LpMinimize)
+            instance.set_maximize()
 
         query_vars = query.query_vars()
 
-        # prob += pulp.LpAffineExpression(
-        #     [
-        #         (self.__variables[query.objective().var], 1)
-        #     ]
-        # )
-
         for category in query.inputs().values():
             for input_var, input in category.elements.items():
-                variable = self.__variables[input_var]
                 if isinstance(input.value, AmountValue):
-                    prob += variable >= -input.value.value
+                    instance.restrict(input_var, lower=-input.value.value)
                 elif isinstance(input.value, AnyValue):
-                    prob += variable <= 0
+                    instance.restrict(input_var, upper=0)
                 elif isinstance(input.value, MaximizeValue):
-                    prob += -variable
+                    instance.add_objective(input_var, -1)
 
         for output_var, output in query.outputs().elements.items():
-            variable = self.__variables[output_var]
             if isinstance(output.value, AmountValue):
-                prob += variable == output.value.value
+                instance.fix(output_var, output.value.value)
             elif isinstance(output.value, AnyValue):
-                prob += variable >= 0
+                instance.restrict(output_var, lower=0)
             elif isinstance(output.value, MaximizeValue):
-                prob += variable
-
-        # Display the problem before all recipes are added
-        # print("Problem:", prob)
-
-        # Add constraints for all item, crafter, and power equalities
-        for exp in self.__equalities:
-            prob += exp
+                instance.add_objective(output_var, 1)
 
         # Add item constraints
         for item in self.__db.items().values():
@@ -711,75 +769,223 @@ class Optimizer:
                 continue
             if item.is_resource():
                 if query.is_strict_input_category("item"):
-                    prob.addConstraint(self.__variables[item.var()] == 0, item.var())
+                    instance.fix(item.var(), 0)
                 else:
-                    prob.addConstraint(self.__variables[item.var()] <= 0, item.var())
+                    instance.restrict(item.var(), upper=0)
             else:
                 if query.is_strict_outputs():
-                    prob.addConstraint(self.__variables[item.var()] == 0, item.var())
+                    instance.fix(item.var(), 0)
                 else:
-                    prob.addConstraint(self.__variables[item.var()] >= 0, item.var())
+                    instance.restrict(item.var(), lower=0)
 
         if query.is_strict_input_category("crafter"):
             for crafter_var in self.__db.crafters():
                 if crafter_var in query_vars:
                     continue
-                prob.addConstraint(self.__variables[crafter_var] == 0, crafter_var)
+                instance.fix(crafter_var, 0)
         if query.is_strict_input_category("generator"):
             for generator_var in self.__db.generators():
                 if generator_var in query_vars:
                     continue
-                prob.addConstraint(self.__variables[generator_var] == 0, generator_var)
+                instance.fix(generator_var, 0)
         if query.is_strict_input_category("recipe"):
             for recipe_var in self.__db.recipes():
                 if recipe_var in query_vars:
                     continue
-                prob.addConstraint(self.__variables[recipe_var] == 0, recipe_var)
+                instance.fix(recipe_var, 0)
         if query.is_strict_input_category("power_recipe"):
             for power_recipe_var in self.__db.power_recipes():
                 if power_recipe_var in query_vars:
                     continue
-                prob.addConstraint(
-                    self.__variables[power_recipe_var] == 0, power_recipe_var
-                )
+                instance.fix(power_recipe_var, 0)
 
-        self.enable_related_recipes(query, prob, debug=self.__debug)
+        self.enable_related_recipes(query, instance, debug=self.__debug)
 
         # Disable power recipes unless the query specifies something about power
         if not query.has_power_output():
             for power_recipe_var in self.__db.power_recipes():
-                prob.addConstraint(
-                    self.__variables[power_recipe_var] == 0, power_recipe_var
-                )
+                instance.fix(power_recipe_var, 0)
 
         # Disable geothermal generators since they are "free" energy.
         if "generator:geo-thermal-generator" not in query_vars:
-            prob += self.__variables["generator:geothermal-generator"] == 0
+            instance.fix("generator:geothermal-generator", 0)
 
         # Disable biomasss burners since they cannot be automated.
         # if "generator:biomass-burner" not in query_vars:
-        #     prob += self.__variables["generator:biomass-burner"] == 0
+        #     instance.fix("generator:biomass-burner", 0)
 
         # Disable alternate recipes unless the query specifically allows it
         if ALTERNATE_RECIPES not in query_vars:
-            prob += self.__variables[ALTERNATE_RECIPES] == 0
+            instance.fix(ALTERNATE_RECIPES, 0)
+
+        # Count the buildings of each recipe and power recipe in whole buildings, where the last building
+        # of a recipe may be partly idle, so every type of building is counted in whole buildings as well.
+        # Otherwise every building is fully used and counts can be fractions.
+        for recipe_var in self.__building_recipes:
+            if query.whole_buildings():
+                instance.set_integer(RECIPE_BUILDINGS + recipe_var)
+            else:
+                instance.fix(IDLE + recipe_var, 0)
+        return instance
+
+    # Optimizes all queries over the shared compiled model, running up to one solve per solver pool
+    # worker at a time. Results are returned in the order of the queries, a query that fails gets an
+    # ErrorResult without affecting the others.
+    async def optimize_many(self, queries: list[OptimizationQuery]) -> list[Result]:
+        semaphore = asyncio.Semaphore(self.__pool.workers())
+
+        async def optimize_one(query: OptimizationQuery) -> Result:
+            async with semaphore:
+                try:
+                    return await self.optimize(query)
+                except SolverPoolFullException as pool_exception:
+                    return ErrorResult(str(pool_exception))
+                except Exception as exception:
+                    return ErrorResult(f"Failed to optimize {query}: {exception}")
+
+        return list(await asyncio.gather(*[optimize_one(query) for query in queries]))
+
+    def __solve(self, instance: ModelInstance, query: OptimizationQuery, control: SolveControl) -> OptimizationResult:
+        start = time.perf_counter()
+        # Only the columns and rows that are still undecided after presolve are passed to the solver.
+        problem = presolve(instance)
+        timings = {"presolve": time.perf_counter() - start, "solve": 0.0}
+
+        # Production chains without any choice to make are expanded directly, everything else is solved.
+        values = self.__planner.plan(query, instance, problem)
+        if values is not None:
+            objective_value = sum(coeff * values[column] for column, coeff in instance.objective().items())
+            solution = SolutionSnapshot(self.__model, values, objective_value)
+            return OptimizationResult(
+                self.__db, self.__entity_columns, solution, LpStatusOptimal, query, plan=CHAIN
+            )
 
-        # Display the problem
-        # print(prob)
+        trace = self.__trace_recorder.should_trace(query.trace())
+        relaxation = instance.copy() if query.whole_buildings() else None
+        problem, status, values, objective_value, row_duals, reduced_costs, gap = self.__solve_stages(
+            instance, query, control, timings, problem
+        )
+        relaxed = False
+        if relaxation is not None and status is LpStatusNotSolved and not control.is_cancelled():
+            # The whole building solve ran out of time, fall back to fractional buildings.
+            relaxation.relax()
+            problem, status, values, objective_value, row_duals, reduced_costs, gap = self.__solve_stages(
+                relaxation, query, control, timings
+            )
+            relaxed = True
+        elif relaxation is not None and status is LpStatusOptimal:
+            self.__remove_idle_buildings(values)
 
-        # Write out complete problem to file
-        filename = "output" + os.path.sep + "problem.txt"
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "w") as f:
-            f.write(str(prob))
+        if trace:
+            self.__trace_recorder.record(SolveTrace(str(query), self.__backend.name(), status, problem, timings))
 
-        # Solve
-        status = prob.solve(PULP_CBC_CMD(msg=False))
-        result = OptimizationResult(self.__db, self.__variables, prob, status, query)
+        # Copy the solution out of the solver so that the result does not hold on to any solver state.
+        solution = SolutionSnapshot(self.__model, values, objective_value, row_duals, reduced_costs)
+        result = OptimizationResult(
+            self.__db, self.__entity_columns, solution, status, query, mip_gap=gap, relaxed=relaxed
+        )
 
         if self.__debug:
-            for var_name, var in self.__variables.items():
-                if var.value() and abs(var.value()) > EPSILON:
-                    print(f"Variable {var_name} had a value of {var.value()}")
+            for var_name, value in zip(self.__model.columns(), solution.values()):
+                if abs(value) > EPSILON:
+                    print(f"Variable {var_name} had a value of {value}")
 
         return result
+
+    # The first stage is solved from 'problem' if it is the presolved instance already.
+    def __solve_stages(
+            self,
+            instance: ModelInstance,
+            query: OptimizationQuery,
+            control: SolveControl,
+            timings: dict[str, float],
+            problem: ReducedProblem | None = None,
+    ) -> tuple[ReducedProblem, int, list[float], float | None, list[float] | None, list[float] | None, float | None]:
+        problem, status, values, objective_value, row_duals, reduced_costs, gap = self.__solve_instance(
+            instance, control, timings, problem
+        )
+
+        # Lexicographic objectives: every following stage maximizes its variable while keeping the
+        # variable of each stage before it at its optimum. Every objective maximizes a single column
+        # (an input objective minimizes usage, which is a negative column), so keeping an optimum is
+        # only a bound on the same instance. The first objective value is reported and sensitivity is
+        # left out since it would only describe the last stage.
+        stage_var = query.objective().var if query.has_objective() else None
+        for then_var in query.then_objectives():
+            if status is not LpStatusOptimal:
+                break
+            optimum = values[self.__model.column(stage_var)]
+            instance.restrict(stage_var, lower=optimum - STAGE_TOLERANCE * max(1.0, abs(optimum)))
+            instance.clear_objective()
+            instance.set_maximize()
+            instance.add_objective(then_var, 1)
+            problem, status, values, _, _, _, stage_gap = self.__solve_instance(instance, control, timings)
+            row_duals, reduced_costs = None, None
+            if stage_gap is not None:
+                gap = max(gap or 0.0, stage_gap)
+            stage_var = then_var
+        if status is not LpStatusOptimal:
+            objective_value = None
+        return problem, status, values, objective_value, row_duals, reduced_costs, gap
+
+    # Nothing in the model asks for as few buildings as possible unless the query does, so a whole
+    # building solution may have more idle buildings than it needs. Building counts only appear in their
+    # own rows, the rows of their type of building and the total of all buildings, so removing the extra
+    # ones keeps the solution optimal.
+    def __remove_idle_buildings(self, values: list[float]) -> None:
+        model = self.__model
+        totals = {building_var: 0.0 for building_var in [*self.__db.crafters(), *self.__db.generators()]}
+        for recipe_var in self.__building_recipes:
+            column = model.column(RECIPE_BUILDINGS + recipe_var)
+            # The amount of buildings the recipe needs.
+            needed = -values[model.column(recipe_var)]
+            values[column] = float(math.ceil(needed - EPSILON))
+            values[model.column(IDLE + recipe_var)] = values[column] - needed
+            if recipe_var in self.__db.recipes():
+                totals[self.__db.recipes()[recipe_var].crafter().var()] -= values[column]
+            else:
+                totals[self.__db.power_recipes()[recipe_var].generator().var()] -= values[column]
+        for building_var, total in totals.items():
+            values[model.column(building_var)] = total
+        values[model.column(BUILDINGS)] = sum(totals.values())
+
+    def __solve_instance(
+            self,
+            instance: ModelInstance,
+            control: SolveControl,
+            timings: dict[str, float],
+            problem: ReducedProblem | None = None,
+    ) -> tuple[ReducedProblem, int, list[float], float | None, list[float] | None, list[float] | None, float | None]:
+        start = time.perf_counter()
+        # Only the columns and rows that are still undecided after presolve are passed to the solver.
+        if problem is None:
+            problem = presolve(instance)
+        presolved = time.perf_counter()
+        if self.__debug:
+            print(
+                f"Presolve reduced the problem to {problem.num_columns()}/{self.__model.num_columns()} columns"
+                f" and {problem.num_rows()}/{self.__model.num_rows()} rows"
+            )
+        row_duals, reduced_costs, gap = None, None, None
+        if problem.is_infeasible():
+            status, values, objective_value = LpStatusInfeasible, [0.0] * self.__model.num_columns(), None
+        elif problem.num_columns() == 0:
+            status, values, objective_value = LpStatusOptimal, problem.expand([]), problem.objective_offset()
+            row_duals, reduced_costs = problem.expand_sensitivity(values, [])
+        else:
+            solver_solution = self.__backend.solve(problem, control)
+            status = solver_solution.status
+            gap = solver_solution.gap
+            if status is LpStatusOptimal:
+                values = problem.expand(solver_solution.values)
+                objective_value = solver_solution.objective_value + problem.objective_offset()
+                if solver_solution.row_duals is not None:
+                    row_duals, reduced_costs = problem.expand_sensitivity(values, solver_solution.row_duals)
+            else:
+                values = [0.0] * self.__model.num_columns()
+                objective_value = solver_solution.objective_value
+        if not problem.has_objective():
+            objective_value = None
+        timings["presolve"] += presolved - start
+        timings["solve"] += time.perf_counter() - presolved
+        return problem, status, values, objective_value, row_duals, reduced_costs, gap
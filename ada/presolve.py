@@ -0,0 +1,333 @@
+import math
+
+import pulp
+from pulp.pulp import LpConstraint, LpProblem, LpVariable
+
+from .compiled_model import INFINITY, ModelInstance
+
+TOLERANCE = 1e-9
+
+
+class ReducedProblem:
+    # The part of a model instance that is left for the solver after presolve. Columns and rows are
+    # renumbered, columns() and rows() map them back to the indices in the compiled model. Columns
+    # removed by presolve have a fixed value that is filled back in by expand().
+    def __init__(
+            self,
+            instance: ModelInstance,
+            fixed_values: list[float],
+            columns: list[int],
+            rows: list[int],
+            row_lower: list[float],
+            row_upper: list[float],
+            col_lower: list[float],
+            col_upper: list[float],
+            objective_offset: float,
+            infeasible: bool,
+            singleton_rows: list[tuple[int, int, float, float, float]] | None = None,
+    ) -> None:
+        model = instance.model()
+        self.__instance = instance
+        self.__fixed_values = fixed_values
+        self.__columns = columns
+        self.__rows = rows
+        self.__col_lower = [col_lower[column] for column in columns]
+        self.__col_upper = [col_upper[column] for column in columns]
+        self.__cost = [instance.objective().get(column, 0.0) for column in columns]
+        self.__integrality = [column in instance.integer_columns() for column in columns]
+        self.__objective_offset = objective_offset
+        self.__infeasible = infeasible
+        self.__singleton_rows = singleton_rows or []
+
+        reduced_column = {column: index for index, column in enumerate(columns)}
+        self.__row_starts = [0]
+        self.__row_cols = []
+        self.__row_coeffs = []
+        for row in rows:
+            for column, coeff in zip(*model.row(row)):
+                if column in reduced_column:
+                    self.__row_cols.append(reduced_column[column])
+                    self.__row_coeffs.append(coeff)
+            self.__row_starts.append(len(self.__row_cols))
+        self.__row_lower = [row_lower[row] for row in rows]
+        self.__row_upper = [row_upper[row] for row in rows]
+
+    def instance(self) -> ModelInstance:
+        return self.__instance
+
+    def is_infeasible(self) -> bool:
+        return self.__infeasible
+
+    def is_maximize(self) -> bool:
+        return self.__instance.is_maximize()
+
+    def has_objective(self) -> bool:
+        return len(self.__instance.objective()) > 0
+
+    def is_mip(self) -> bool:
+        return any(self.__integrality)
+
+    # Whether each column may only take whole values.
+    def integrality(self) -> list[bool]:
+        return self.__integrality
+
+    def columns(self) -> list[int]:
+        return self.__columns
+
+    def rows(self) -> list[int]:
+        return self.__rows
+
+    def num_columns(self) -> int:
+        return len(self.__columns)
+
+    def num_rows(self) -> int:
+        return len(self.__rows)
+
+    def cost(self) -> list[float]:
+        return self.__cost
+
+    def objective_offset(self) -> float:
+        return self.__objective_offset
+
+    def col_lower(self) -> list[float]:
+        return self.__col_lower
+
+    def col_upper(self) -> list[float]:
+        return self.__col_upper
+
+    def row_starts(self) -> list[int]:
+        return self.__row_starts
+
+    def row_cols(self) -> list[int]:
+        return self.__row_cols
+
+    def row_coeffs(self) -> list[float]:
+        return self.__row_coeffs
+
+    def row_lower(self) -> list[float]:
+        return self.__row_lower
+
+    def row_upper(self) -> list[float]:
+        return self.__row_upper
+
+    # Maps values of the reduced columns back onto every column of the compiled model.
+    def expand(self, values: list[float]) -> list[float]:
+        full = list(self.__fixed_values)
+        for column, value in zip(self.__columns, values):
+            full[column] = value
+        return full
+
+    # Maps row duals of the reduced rows back onto every row of the compiled model and derives the
+    # reduced cost of every column, including the ones removed by presolve, from them:
+    #   reduced_cost[j] = cost[j] - sum(row_dual[i] * coeff[i][j])
+    # A singleton row whose bound is active in the solution takes over the reduced cost of its column,
+    # as if it had been solved as a row. Any other row removed by presolve gets a dual of zero.
+    def expand_sensitivity(self, values: list[float], row_duals: list[float]) -> tuple[list[float], list[float]]:
+        model = self.__instance.model()
+        column_rows = model.column_rows()
+        objective = self.__instance.objective()
+
+        def reduced_cost(column: int) -> float:
+            cost = objective.get(column, 0.0)
+            for row, coeff in column_rows[column]:
+                cost -= full_row_duals[row] * coeff
+            return cost
+
+        full_row_duals = [0.0] * model.num_rows()
+        for row, dual in zip(self.__rows, row_duals):
+            full_row_duals[row] = dual
+        # Undo the singleton rows in the reverse order that presolve removed them.
+        for row, column, coeff, implied_lower, implied_upper in reversed(self.__singleton_rows):
+            value = values[column]
+            if not (
+                    math.isclose(value, implied_lower, rel_tol=1e-6, abs_tol=1e-6)
+                    or math.isclose(value, implied_upper, rel_tol=1e-6, abs_tol=1e-6)
+            ):
+                continue
+            full_row_duals[row] = reduced_cost(column) / coeff
+
+        return full_row_duals, [reduced_cost(column) for column in range(model.num_columns())]
+
+    # Builds the problem with pulp, also returning the variable of each column and the constraints of
+    # each row, ranged rows have a constraint for each side.
+    def to_lp_problem(self, name: str) -> tuple[LpProblem, list[LpVariable], list[list[LpConstraint]]]:
+        model = self.__instance.model()
+        column_names = model.columns()
+        row_names = model.rows()
+        sense = pulp.LpMaximize if self.is_maximize() else pulp.LpMinimize
+        prob = pulp.LpProblem(name, sense)
+
+        variables = []
+        for index, column in enumerate(self.__columns):
+            lower = self.__col_lower[index]
+            upper = self.__col_upper[index]
+            variables.append(
+                pulp.LpVariable(
+                    column_names[column],
+                    lowBound=lower if lower > -INFINITY else None,
+                    upBound=upper if upper < INFINITY else None,
+                    cat=pulp.LpInteger if self.__integrality[index] else pulp.LpContinuous,
+                )
+            )
+
+        prob.setObjective(
+            pulp.LpAffineExpression(
+                [(variables[index], coeff) for index, coeff in enumerate(self.__cost) if coeff != 0]
+            )
+        )
+
+        constraints = []
+        for index, row in enumerate(self.__rows):
+            start = self.__row_starts[index]
+            end = self.__row_starts[index + 1]
+            expression = pulp.LpAffineExpression(
+                [(variables[self.__row_cols[k]], self.__row_coeffs[k]) for k in range(start, end)]
+            )
+            lower = self.__row_lower[index]
+            upper = self.__row_upper[index]
+            row_constraints = []
+            if lower == upper:
+                row_constraints.append(pulp.LpConstraint(expression, pulp.LpConstraintEQ, row_names[row], lower))
+            else:
+                if lower > -INFINITY:
+                    row_constraints.append(
+                        pulp.LpConstraint(expression, pulp.LpConstraintGE, row_names[row] + ":lower", lower)
+                    )
+                if upper < INFINITY:
+                    row_constraints.append(
+                        pulp.LpConstraint(expression, pulp.LpConstraintLE, row_names[row] + ":upper", upper)
+                    )
+            for constraint in row_constraints:
+                prob.addConstraint(constraint)
+            constraints.append(row_constraints)
+
+        return prob, variables, constraints
+
+
+def presolve(instance: ModelInstance) -> ReducedProblem:
+    # Removes every column whose value is already decided by the bounds of the instance, e.g. the
+    # recipes that are disabled for a query, together with everything that only existed for them:
+    #  - fixed columns are substituted into their rows,
+    #  - empty rows are dropped,
+    #  - singleton rows become bounds on their column,
+    #  - forcing rows, whose activity can only meet the row bounds with every column at one of its
+    #    bounds, fix all of their columns.
+    # Bounds of integer columns are rounded inwards to whole values.
+    # The rules are repeated until nothing changes, so disabling a recipe also removes the crafters,
+    # items and generators that only that recipe used.
+    model = instance.model()
+    col_lower = list(instance.col_lower())
+    col_upper = list(instance.col_upper())
+    row_lower = list(model.row_lower())
+    row_upper = list(model.row_upper())
+    column_rows = model.column_rows()
+    objective = instance.objective()
+    integer_columns = instance.integer_columns()
+    for column in integer_columns:
+        col_lower[column], col_upper[column] = _whole_bounds(col_lower[column], col_upper[column])
+
+    fixed_values = [0.0] * model.num_columns()
+    col_alive = [True] * model.num_columns()
+    row_alive = [True] * model.num_rows()
+    objective_offset = 0.0
+    pending_rows = list(range(model.num_rows()))
+    singleton_rows = []
+
+    def fix(column: int, value: float) -> None:
+        nonlocal objective_offset
+        col_alive[column] = False
+        fixed_values[column] = value
+        objective_offset += objective.get(column, 0.0) * value
+        for row, coeff in column_rows[column]:
+            if not row_alive[row]:
+                continue
+            row_lower[row] -= coeff * value
+            row_upper[row] -= coeff * value
+            pending_rows.append(row)
+
+    for column in range(model.num_columns()):
+        if col_upper[column] < col_lower[column] - TOLERANCE:
+            return ReducedProblem(
+                instance, fixed_values, [], [], row_lower, row_upper, col_lower, col_upper, 0.0, True
+            )
+        if col_lower[column] == col_upper[column]:
+            fix(column, col_lower[column])
+
+    infeasible = False
+    while pending_rows and not infeasible:
+        row = pending_rows.pop()
+        if not row_alive[row]:
+            continue
+        terms = [(column, coeff) for column, coeff in zip(*model.row(row)) if col_alive[column]]
+        lower = row_lower[row]
+        upper = row_upper[row]
+
+        if len(terms) == 0:
+            row_alive[row] = False
+            infeasible = lower > TOLERANCE or upper < -TOLERANCE
+            continue
+
+        if len(terms) == 1:
+            row_alive[row] = False
+            column, coeff = terms[0]
+            if coeff < 0:
+                lower, upper = upper, lower
+            singleton_rows.append((row, column, coeff, lower / coeff, upper / coeff))
+            new_lower = max(col_lower[column], lower / coeff)
+            new_upper = min(col_upper[column], upper / coeff)
+            if column in integer_columns:
+                new_lower, new_upper = _whole_bounds(new_lower, new_upper)
+            if new_upper < new_lower - TOLERANCE:
+                infeasible = True
+            elif new_upper - new_lower <= TOLERANCE:
+                col_lower[column] = col_upper[column] = new_lower
+                fix(column, new_lower)
+            elif new_lower != col_lower[column] or new_upper != col_upper[column]:
+                col_lower[column] = new_lower
+                col_upper[column] = new_upper
+                pending_rows.extend(other_row for other_row, _ in column_rows[column])
+            continue
+
+        min_activity = 0.0
+        max_activity = 0.0
+        for column, coeff in terms:
+            if coeff > 0:
+                min_activity += coeff * col_lower[column]
+                max_activity += coeff * col_upper[column]
+            else:
+                min_activity += coeff * col_upper[column]
+                max_activity += coeff * col_lower[column]
+        if min_activity > upper + TOLERANCE or max_activity < lower - TOLERANCE:
+            infeasible = True
+        elif min_activity > -INFINITY and min_activity >= upper - TOLERANCE:
+            row_alive[row] = False
+            for column, coeff in terms:
+                fix(column, col_lower[column] if coeff > 0 else col_upper[column])
+        elif max_activity < INFINITY and max_activity <= lower + TOLERANCE:
+            row_alive[row] = False
+            for column, coeff in terms:
+                fix(column, col_upper[column] if coeff > 0 else col_lower[column])
+
+    columns = [column for column in range(model.num_columns()) if col_alive[column]]
+    rows = [row for row in range(model.num_rows()) if row_alive[row]]
+    return ReducedProblem(
+        instance,
+        fixed_values,
+        columns,
+        rows,
+        row_lower,
+        row_upper,
+        col_lower,
+        col_upper,
+        objective_offset,
+        infeasible,
+        singleton_rows,
+    )
+
+
+def _whole_bounds(lower: float, upper: float) -> tuple[float, float]:
+    if lower > -INFINITY:
+        lower = float(math.ceil(lower - TOLERANCE))
+    if upper < INFINITY:
+        upper = float(math.floor(upper + TOLERANCE))
+    return lower, upper
@@ -10,6 +10,7 @@ from pyparsing import (
     OneOrMore,
     Optional,
     ParseException,
+    Regex,
     StringEnd,
     Suppress,
     Word,
@@ -29,7 +30,7 @@ from .db.item import Item
 from .db.recipe import Recipe
 from .help import HelpQuery
 from .info import InfoQuery
-from .optimization_query import AmountValue, AnyValue, MaximizeValue, OptimizationQuery
+from .optimization_query import AmountValue, AnyValue, MaximizeValue, OptimizationQuery, RangeValue
 from .query import Query
 
 PRODUCE = CaselessKeyword("produce")
@@ -65,6 +66,10 @@ QUESTION_MARK = Literal("?")
 UNDERSCORE = Literal("_")
 ZERO = Literal("0")
 PLUS = Literal("+")
+STEP = CaselessKeyword("step")
+THEN = CaselessKeyword("then")
+BUILDINGS = CaselessKeyword("buildings")
+WHOLE_BUILDINGS = CaselessKeyword("whole buildings") | CaselessKeyword("whole-buildings")
 
 
 class QueryParseException(Exception):
@@ -87,6 +92,9 @@ class QueryParser:
     alternate_recipes_kw = ALTERNATE_RECIPES.setParseAction(
         replaceWith("alternate-recipes")
     )
+    whole_buildings_kw = WHOLE_BUILDINGS.setParseAction(
+        replaceWith("whole-buildings")
+    )
 
     entity_expr_end = (
             output_kw
@@ -94,6 +102,8 @@ class QueryParser:
             | exclude_kw
             | and_kw
             | or_kw
+            | STEP
+            | THEN
             | StringEnd()
     )
     entity_expr = Combine(
@@ -107,11 +117,19 @@ class QueryParser:
     output_literal = POWER("power")("literal")
     output_var = output_literal | entity_expr
 
-    input_literal = (POWER | unweighted_resources_kw | weighted_resources_kw | alternate_recipes_kw)(
-        "literal"
-    )
+    input_literal = (
+            POWER
+            | unweighted_resources_kw
+            | weighted_resources_kw
+            | alternate_recipes_kw
+            | whole_buildings_kw
+            | BUILDINGS
+    )("literal")
     input_var = input_literal | entity_expr
 
+    then_literal = (POWER | unweighted_resources_kw | weighted_resources_kw | BUILDINGS)("literal")
+    then_var = then_literal | entity_expr
+
     exclude_literal = alternate_recipes_kw("literal")
     exclude_var = exclude_literal | entity_expr
 
@@ -119,13 +137,16 @@ class QueryParser:
     any_value = Optional(ANY | UNDERSCORE).setParseAction(replaceWith("_"))
     no_value = NO
     num_value = pyparsing_common.integer
-    value = (objective_value | num_value | any_value | no_value)("value")
+    range_value = Regex(r"\d+\.\.\d+")
+    value = (objective_value | range_value | num_value | any_value | no_value)("value")
+    step = Optional(Suppress(STEP) + pyparsing_common.integer("step"))
 
     strict = Optional(ONLY)("strict").setParseAction(lambda t: len(t) != 0)
 
-    output_expr = Group(strict + value + output_var)
-    input_expr = Group(strict + value + input_var)
+    output_expr = Group(strict + value + output_var + step)
+    input_expr = Group(strict + value + input_var + step)
     exclude_expr = Group(exclude_var)
+    then_expr = Group(Suppress(THEN) + Suppress(QUESTION_MARK) + then_var)
 
     outputs = output_expr + ZeroOrMore(Suppress(and_kw) + output_expr)
     inputs = input_expr + ZeroOrMore(Suppress(and_kw) + input_expr)
@@ -134,8 +155,9 @@ class QueryParser:
     outputs_expr = (Suppress(output_kw) + outputs)("outputs")
     inputs_expr = Optional(Suppress(input_kw) + inputs)("inputs")
     excludes_expr = Optional(Suppress(exclude_kw) + excludes)("excludes")
+    thens_expr = ZeroOrMore(then_expr)("thens")
 
-    optimization_query = (outputs_expr + inputs_expr + excludes_expr)(
+    optimization_query = (outputs_expr + inputs_expr + excludes_expr + thens_expr)(
         "optimization"
     )
 
@@ -268,6 +290,31 @@ class QueryParser:
             matches.append(var)
         return matches
 
+    @staticmethod
+    def _parse_value(
+            expr: ParseResults, query: OptimizationQuery
+    ) -> AmountValue | MaximizeValue | AnyValue | RangeValue:
+        value = expr["value"]
+        if "step" in expr and ".." not in str(value):
+            raise QueryParseException("A step may only be specified for a range like '60..600'.")
+        if value == "?":
+            if query.has_objective():
+                raise QueryParseException("Only one objective may be specified.")
+            return MaximizeValue()
+        if value == "_":
+            return AnyValue()
+        if ".." in str(value):
+            if query.range_element() is not None:
+                raise QueryParseException("Only one range may be specified.")
+            start, stop = (int(bound) for bound in value.split(".."))
+            step = int(expr["step"]) if "step" in expr else None
+            if stop <= start:
+                raise QueryParseException(f"The range {start}..{stop} must end above where it starts.")
+            if step is not None and step <= 0:
+                raise QueryParseException("The step of a range must be positive.")
+            return RangeValue(start, stop, step)
+        return AmountValue(int(value))
+
     def _parse_outputs(self, outputs: ParseResults, query: OptimizationQuery) -> None:
         if not outputs:
             raise QueryParseException("No outputs specified in optimization query.")
@@ -284,23 +331,20 @@ class QueryParser:
                         "Could not parse item expression '" + output["entity"] + "'."
                     )
             strict = output["strict"]
-            value = output["value"]
             for output_var in output_vars:
-                if value == "?":
-                    if query.has_objective():
-                        raise QueryParseException("Only one objective may be specified.")
-                    val = MaximizeValue()
-                elif value == "_":
-                    val = AnyValue()
-                else:
-                    val = AmountValue(int(value))
-                query.add_output(output_var, val, strict)
+                query.add_output(output_var, self._parse_value(output, query), strict)
 
     def _parse_inputs(self, inputs: ParseResults, query: OptimizationQuery) -> None:
         if not inputs:
             return
         for input_ in inputs:
             input_vars = []
+            if "literal" in input_ and input_["literal"] == "whole-buildings":
+                # Not an input but a setting of the query.
+                if input_["value"] != "_" or input_["strict"]:
+                    raise QueryParseException("Whole buildings cannot have an amount or be 'only'.")
+                query.set_whole_buildings(True)
+                continue
             if "literal" in input_:
                 input_vars = [input_["literal"]]
             elif "entity" in input_:
@@ -323,17 +367,8 @@ class QueryParser:
                         + "'."
                     )
             strict = input_["strict"]
-            value = input_["value"]
             for input_var in input_vars:
-                if value == "?":
-                    if query.has_objective():
-                        raise QueryParseException("Only one objective may be specified.")
-                    val = MaximizeValue()
-                elif value == "_":
-                    val = AnyValue()
-                else:
-                    val = AmountValue(int(value))
-                query.add_input(input_var, val, strict)
+                query.add_input(input_var, self._parse_value(input_, query), strict)
 
     def _parse_excludes(self, excludes: ParseResults, query: OptimizationQuery) -> None:
         if not excludes:
@@ -364,6 +399,28 @@ class QueryParser:
             for exclude_var in exclude_vars:
                 query.add_output(exclude_var, AmountValue(0), False)
 
+    def _parse_thens(self, thens: ParseResults, query: OptimizationQuery) -> None:
+        if not thens:
+            return
+        if not query.has_objective():
+            raise QueryParseException("A 'then ?' objective must follow a '?' objective.")
+        for then in thens:
+            if "literal" in then:
+                then_var = then["literal"]
+            else:
+                matches = self._get_matches(
+                    then["entity"], ["item", "recipe", "power-recipe", "crafter", "generator"]
+                )
+                if len(matches) != 1:
+                    raise QueryParseException(
+                        f"A 'then ?' objective must match exactly one item, recipe, power recipe, crafter, or "
+                        f"generator, '{then['entity']}' matches {len(matches)}."
+                    )
+                then_var = matches[0].var()
+            if then_var == query.objective().var or then_var in query.then_objectives():
+                raise QueryParseException(f"'{then_var}' is already an objective.")
+            query.add_then_objective(then_var)
+
     def _parse_optimization_query(
             self, raw_query: str, parse_results: ParseResults
     ) -> OptimizationQuery:
@@ -379,6 +436,12 @@ class QueryParser:
                 query.add_input("unweighted-resources", MaximizeValue(), False)
             else:
                 query.add_input("unweighted-resources")
+        if query.range_element() is not None and not query.has_objective():
+            raise QueryParseException("A query with a range needs a '?' objective to sweep.")
+        if query.range_element() is not None and query.whole_buildings():
+            # The sweep interpolates between amounts, whole buildings make the objective jump in steps.
+            raise QueryParseException("A query with a range cannot count whole buildings.")
+        self._parse_thens(parse_results.get("thens"), query)
         return query
 
     def _parse_recipe_for_query(self, raw_query, parse_results):
@@ -0,0 +1,160 @@
+import threading
+
+import numpy as np
+
+from .compiled_model import CompiledModel, ModelInstance
+from .db.db import DB
+from .optimization_query import AmountValue, AnyValue, Input, OptimizationQuery
+from .presolve import ReducedProblem
+
+# The paths a query can take through the planner.
+CHAIN = "chain"
+LP = "lp"
+
+TOLERANCE = 0.000001
+
+
+class QueryPlanner:
+    # Decides for each optimization query whether it needs the LP at all.
+    #
+    # A query that asks for fixed amounts of items while using as few resources as possible, where
+    # every item on the way has exactly one enabled recipe and no byproduct is used again, has a single
+    # answer: run every recipe just enough for the recipes after it. Such chains are expanded from the
+    # outputs down to the resources one level at a time, all items of a level at once, and every other
+    # column follows from the rows of the model. Anything else, or a chain whose answer does not fit
+    # the bounds of the query, is solved as an LP.
+    def __init__(self, db: DB, model: CompiledModel, resource_objectives: set[str]) -> None:
+        self.__matrix = db.recipe_matrix()
+        self.__model = model
+        self.__resource_objectives = resource_objectives
+        self.__recipe_columns = np.array([model.column(var) for var in self.__matrix.recipe_vars()], dtype=np.intp)
+        self.__is_resource = np.array([db.items()[var].is_resource() for var in self.__matrix.item_vars()])
+        self.__paths = {CHAIN: 0, LP: 0}
+        # Queries are planned on the solver pool threads.
+        self.__lock = threading.Lock()
+
+    # Number of queries that took each path.
+    def paths(self) -> dict[str, int]:
+        with self.__lock:
+            return dict(self.__paths)
+
+    # Returns the value of every model column if the query is a chain, None if it needs the LP. The
+    # problem is the presolved instance, which the LP is solved from otherwise.
+    def plan(self, query: OptimizationQuery, instance: ModelInstance, problem: ReducedProblem) -> list[float] | None:
+        values = self.__expand_chain(query, instance, problem) if self.__is_chain_query(query) else None
+        with self.__lock:
+            self.__paths[LP if values is None else CHAIN] += 1
+        return values
+
+    def __is_chain_query(self, query: OptimizationQuery) -> bool:
+        if query.then_objectives() or query.whole_buildings() or query.trace() or query.has_power_output():
+            return False
+        objective = query.objective()
+        if not isinstance(objective, Input) or objective.var not in self.__resource_objectives:
+            return False
+        if query.is_strict_outputs():
+            return False
+        items = self.__matrix.item_vars()
+        for output_var, output in query.outputs().elements.items():
+            if not isinstance(output.value, AmountValue):
+                return False
+            # Outputs of anything but items are exclusions, which presolve takes care of.
+            if (output.value.value > 0) != (output_var in items):
+                return False
+        for category in query.inputs().values():
+            if category.strict:
+                return False
+            for input_var, input_ in category.elements.items():
+                if input_var == objective.var:
+                    continue
+                if input_var == "alternate-recipes" and isinstance(input_.value, AnyValue):
+                    continue
+                return False
+        return True
+
+    def __expand_chain(
+            self, query: OptimizationQuery, instance: ModelInstance, problem: ReducedProblem
+    ) -> list[float] | None:
+        matrix = self.__matrix
+        ingredient_rates = matrix.ingredient_rates()
+        product_rates = matrix.product_rates()
+        is_resource = self.__is_resource
+
+        # Recipes that presolve could not rule out for this query, including the ones it already fixed
+        # to a nonzero amount.
+        if problem.is_infeasible():
+            return None
+        enabled = np.array(problem.expand([1.0] * problem.num_columns())) != 0
+        enabled = enabled[self.__recipe_columns] & matrix.craftable()
+        producing = (product_rates > 0) & enabled
+        producer_count = producing.sum(axis=1)
+        producer = producing.argmax(axis=1)
+
+        demand = np.zeros(len(matrix.item_vars()))
+        for output_var, output in query.outputs().elements.items():
+            if output.value.value > 0:
+                demand[matrix.item_index(output_var)] = output.value.value
+
+        # Every item that the outputs are made from, each one needs exactly one recipe.
+        in_chain = np.zeros(len(demand), dtype=bool)
+        frontier = demand > 0
+        while frontier.any():
+            crafted = frontier & ~is_resource
+            if np.any(producer_count[crafted] != 1):
+                return None
+            in_chain |= frontier
+            frontier = (ingredient_rates[:, producer[crafted]] > 0).any(axis=1) & ~in_chain
+        chain_items = np.flatnonzero(in_chain & ~is_resource)
+        chain_recipes = producer[chain_items]
+        if len(np.unique(chain_recipes)) != len(chain_recipes):
+            return None
+        # A byproduct that is used in the chain could replace some of the production of its recipe.
+        byproducts = product_rates[:, chain_recipes] > 0
+        byproducts[chain_items, np.arange(len(chain_items))] = False
+        if (byproducts & in_chain[:, np.newaxis]).any():
+            return None
+
+        # Walk the chain from the outputs down, an item is done once every recipe that uses it is.
+        # consumes[i, j] is whether the recipe of chain item j uses item i.
+        consumes = ingredient_rates[:, chain_recipes] > 0
+        runs = np.zeros(len(matrix.recipe_vars()))
+        remaining = np.ones(len(chain_items), dtype=bool)
+        while remaining.any():
+            level = remaining & ~consumes[chain_items][:, remaining].any(axis=1)
+            if not level.any():
+                # The recipes of the chain form a cycle.
+                return None
+            items = chain_items[level]
+            recipes = chain_recipes[level]
+            level_runs = demand[items] / product_rates[items, recipes]
+            runs[recipes] = level_runs
+            demand += ingredient_rates[:, recipes] @ level_runs
+            remaining &= ~level
+
+        values = self.__column_values(runs)
+        lower = np.array(instance.col_lower())
+        upper = np.array(instance.col_upper())
+        slack = TOLERANCE * np.maximum(1.0, np.abs(values))
+        if np.any(values < lower - slack) or np.any(values > upper + slack):
+            return None
+        return values.tolist()
+
+    # Recipe variables are negative, every other column is the one its own row defines, e.g. the net
+    # amount of an item, which only depends on the columns of the rows before it.
+    def __column_values(self, runs: np.ndarray) -> np.ndarray:
+        model = self.__model
+        values = np.zeros(model.num_columns())
+        values[self.__recipe_columns] = -runs
+        for row, name in enumerate(model.rows()):
+            column = model.column(name)
+            columns, coeffs = model.row(row)
+            total = 0.0
+            own_coeff = 1.0
+            for other, coeff in zip(columns, coeffs):
+                if other == column:
+                    own_coeff = coeff
+                else:
+                    total += coeff * values[other]
+            values[column] = -total / own_coeff
+        # Round to the precision the solver backends report.
+        return np.array([float(f"{value:.8g}") for value in values])
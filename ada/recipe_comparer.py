@@ -1,3 +1,5 @@
+from typing import cast
+
 from .compare_recipes_for import (
     CompareRecipesForQuery,
     CompareRecipesForResult,
@@ -9,7 +11,7 @@ from .compare_recipes_for import (
 from .db.db import DB
 from .db.recipe import Recipe
 from .optimization_query import AmountValue, MaximizeValue, OptimizationQuery
-from .optimizer import Optimizer
+from .optimizer import OptimizationResult, Optimizer
 from .result import ErrorResult, Result
 
 
@@ -39,38 +41,41 @@ class RecipeComparer:
             RecipeComparer.scaled_production_stats(stats.weighted_stats, scalar),
         )
 
-    @staticmethod
-    def get_base_stats(recipe: Recipe) -> ProductionStats:
+    def get_base_stats(self, recipe: Recipe) -> ProductionStats:
+        matrix = self.__db.recipe_matrix()
+        items = self.__db.items()
+        ingredient_rates = matrix.column_rates(matrix.ingredient_rates(), recipe.var())
         return ProductionStats(
-            {
-                ingredient.item().var(): (ingredient.item(), ingredient.minute_rate())
-                for ingredient in recipe.ingredients().values()
-            },
-            recipe.crafter().power_consumption(),
+            {item_var: (items[item_var], rate) for item_var, rate in ingredient_rates.items()},
+            float(matrix.power_consumption()[matrix.recipe_index(recipe.var())]),
             1,
         )
 
-    async def compute_production_stats(
-            self, recipe: Recipe, weighted: bool, include_alternates: bool
-    ) -> ProductionStats:
-        inputs = {}
-
+    @staticmethod
+    def production_query(
+            recipe: Recipe, weighted: bool, include_alternates: bool
+    ) -> OptimizationQuery:
         query = OptimizationQuery()
         var = "weighted-resources" if weighted else "unweighted-resources"
         query.add_input(var, MaximizeValue(), False)
 
         for ingredient_var, ingredient in recipe.ingredients().items():
-            if ingredient.item().is_resource():
-                inputs[ingredient_var] = (ingredient.item(), ingredient.minute_rate())
-            else:
+            if not ingredient.item().is_resource():
                 # query.eq_constraints[ingredient_var] = ingredient.minute_rate()
                 query.add_output(ingredient_var, AmountValue(ingredient.minute_rate()), False)
 
         if include_alternates:
             query.add_input("alternate-recipes")
 
-        result = await self.__opt.optimize(query)
+        return query
 
+    @staticmethod
+    def production_stats(recipe: Recipe, result: OptimizationResult) -> ProductionStats:
+        inputs = {
+            ingredient_var: (ingredient.item(), ingredient.minute_rate())
+            for ingredient_var, ingredient in recipe.ingredients().items()
+            if ingredient.item().is_resource()
+        }
         inputs.update(result.result_data().inputs())
 
         return ProductionStats(
@@ -79,21 +84,31 @@ class RecipeComparer:
             len(result.result_data().recipes()) + len(inputs) + 1,
         )
 
-    async def compute_recipe_stats(
-            self, recipe: Recipe, include_alternates: bool
-    ) -> RecipeStats:
-        base_stats = self.get_base_stats(recipe)
-        unweighted_stats = await self.compute_production_stats(
-            recipe, False, include_alternates
-        )
-        weighted_stats = await self.compute_production_stats(
-            recipe, True, include_alternates
-        )
-        return RecipeStats(
-            base_stats,
-            unweighted_stats,
-            weighted_stats,
-        )
+    # Computes the stats of all recipes with a single batch of optimizations.
+    async def compute_all_recipe_stats(
+            self, recipes: list[Recipe], include_alternates: bool
+    ) -> list[RecipeStats] | ErrorResult:
+        queries = []
+        for recipe in recipes:
+            queries.append(self.production_query(recipe, False, include_alternates))
+            queries.append(self.production_query(recipe, True, include_alternates))
+        results = await self.__opt.optimize_many(queries)
+        for result in results:
+            if isinstance(result, ErrorResult):
+                return result
+
+        all_stats = []
+        for index, recipe in enumerate(recipes):
+            unweighted_result = cast(OptimizationResult, results[2 * index])
+            weighted_result = cast(OptimizationResult, results[2 * index + 1])
+            all_stats.append(
+                RecipeStats(
+                    self.get_base_stats(recipe),
+                    self.production_stats(recipe, unweighted_result),
+                    self.production_stats(recipe, weighted_result),
+                )
+            )
+        return all_stats
 
     async def compare(self, query: CompareRecipesForQuery) -> Result:
 
@@ -124,9 +139,15 @@ class RecipeComparer:
             base_recipe = related_recipes[0]
             related_recipes.remove(base_recipe)
 
-        base_stats = await self.compute_recipe_stats(
-            base_recipe, query.include_alternates()
-        )
+        related_recipes = [
+            related_recipe for related_recipe in related_recipes if related_recipe.var() != base_recipe.var()
+        ]
+
+        # Compute the stats of all candidate recipes in one batch on the solver pool.
+        all_stats = await self.compute_all_recipe_stats([base_recipe] + related_recipes, query.include_alternates())
+        if isinstance(all_stats, ErrorResult):
+            return all_stats
+        base_stats, *all_related_stats = all_stats
 
         product = base_recipe.products()[query.product().var()]
 
@@ -135,18 +156,12 @@ class RecipeComparer:
         )
 
         related_recipe_stats = []
-        for related_recipe in related_recipes:
-            if related_recipe.var() == base_recipe.var():
-                continue
-
+        for related_recipe, related_stats in zip(related_recipes, all_related_stats):
             related_product_minute_rate = 1
             for related_product in related_recipe.products().values():
                 if related_product.item().var() == query.product().var():
                     related_product_minute_rate = related_product.minute_rate()
 
-            related_stats = await self.compute_recipe_stats(
-                related_recipe, query.include_alternates()
-            )
             related_stats_normalized = self.scaled_recipe_stats(
                 related_stats, 1 / related_product_minute_rate
             )
@@ -0,0 +1,57 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class ResultCache(Generic[T]):
+    # A size-bounded LRU cache whose entries expire 'ttl' seconds after they were added.
+    def __init__(self, max_size: int | None = None, ttl: float | None = None) -> None:
+        if max_size is None:
+            max_size = int(os.getenv("ADA_RESULT_CACHE_SIZE", 256))
+        if ttl is None:
+            ttl = float(os.getenv("ADA_RESULT_CACHE_TTL", 3600))
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__entries: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+
+    def get(self, key: Hashable) -> T | None:
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.__misses += 1
+            return None
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del self.__entries[key]
+            self.__misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.__hits += 1
+        return value
+
+    def put(self, key: Hashable, value: T) -> None:
+        if self.__max_size <= 0:
+            return
+        self.__entries[key] = (time.monotonic() + self.__ttl, value)
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.__entries.clear()
+
+    def hits(self) -> int:
+        return self.__hits
+
+    def misses(self) -> int:
+        return self.__misses
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __str__(self) -> str:
+        return f"{len(self.__entries)}/{self.__max_size} entries, {self.__hits} hits, {self.__misses} misses"
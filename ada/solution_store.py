@@ -0,0 +1,116 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class StoredSolution:
+    def __init__(
+            self,
+            status: int,
+            objective_value: float | None,
+            values: dict[str, float],
+            row_duals: dict[str, float] | None = None,
+            reduced_costs: dict[str, float] | None = None,
+            mip_gap: float | None = None,
+    ) -> None:
+        self.status = status
+        self.objective_value = objective_value
+        self.values = values
+        self.row_duals = row_duals
+        self.reduced_costs = reduced_costs
+        self.mip_gap = mip_gap
+
+
+class SolutionStore:
+    # A SQLite backed store of solved optimization queries that survives restarts. Entries are keyed by
+    # the canonical query and tagged with the version of the game data and the model they were solved
+    # with, entries for any other version are dropped when the store is opened unless 'purge' is False,
+    # e.g. while another store for the previous version is still in use. Only the non-zero variable values
+    # are stored, the full result is rebuilt from them by the optimizer.
+    def __init__(
+            self, data_version: str, path: str | None = None, max_entries: int | None = None, purge: bool = True
+    ) -> None:
+        if path is None:
+            path = os.getenv("ADA_SOLUTION_STORE", "output" + os.path.sep + "solutions.sqlite3")
+        if max_entries is None:
+            max_entries = int(os.getenv("ADA_SOLUTION_STORE_SIZE", 10000))
+        self.__data_version = data_version
+        self.__max_entries = max_entries
+        self.__lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                " key TEXT PRIMARY KEY,"
+                " data_version TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self.__connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+            removed = 0
+            if purge:
+                removed = self.__connection.execute(
+                    "DELETE FROM solutions WHERE data_version != ?", (data_version,)
+                ).rowcount
+        if removed > 0:
+            print(f"Removed {removed} stored solutions for outdated game data")
+
+    @staticmethod
+    def __key(key: tuple) -> str:
+        return repr(key)
+
+    def get(self, key: tuple) -> StoredSolution | None:
+        with self.__lock, self.__connection:
+            row = self.__connection.execute(
+                "SELECT payload FROM solutions WHERE key = ? AND data_version = ?",
+                (self.__key(key), self.__data_version),
+            ).fetchone()
+            if row is None:
+                return None
+            self.__connection.execute(
+                "UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), self.__key(key))
+            )
+        payload = json.loads(row[0])
+        return StoredSolution(
+            payload["status"],
+            payload["objective_value"],
+            payload["values"],
+            payload.get("row_duals"),
+            payload.get("reduced_costs"),
+            payload.get("mip_gap"),
+        )
+
+    def put(self, key: tuple, solution: StoredSolution) -> None:
+        payload = json.dumps(
+            {
+                "status": solution.status,
+                "objective_value": solution.objective_value,
+                "values": solution.values,
+                "row_duals": solution.row_duals,
+                "reduced_costs": solution.reduced_costs,
+                "mip_gap": solution.mip_gap,
+            }
+        )
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "INSERT OR REPLACE INTO solutions (key, data_version, payload, last_used) VALUES (?, ?, ?, ?)",
+                (self.__key(key), self.__data_version, payload, time.time()),
+            )
+            # Evict the least recently used entries once the store grows past its size cap.
+            self.__connection.execute(
+                "DELETE FROM solutions WHERE key IN ("
+                " SELECT key FROM solutions ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.__max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,236 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from pulp import PULP_CBC_CMD
+from pulp.constants import (
+    LpSolutionOptimal,
+    LpStatusInfeasible,
+    LpStatusNotSolved,
+    LpStatusOptimal,
+    LpStatusUnbounded,
+    LpStatusUndefined,
+)
+
+from .presolve import ReducedProblem
+from .result_cache import ResultCache
+
+
+class SolverSolution:
+    # The raw outcome of a solve. Status codes are the pulp status constants for every backend, values
+    # holds one entry per column and row_duals one entry per row of the reduced problem. Row duals are
+    # the change of the objective value per unit the row bounds are raised, whatever the objective sense.
+    # A MIP has no row duals, instead gap is the relative optimality gap the solver proved, or a bound on
+    # it, if known.
+    def __init__(
+            self,
+            status: int,
+            values: list[float],
+            objective_value: float | None,
+            row_duals: list[float] | None = None,
+            gap: float | None = None,
+    ) -> None:
+        self.status = status
+        self.values = values
+        self.objective_value = objective_value
+        self.row_duals = row_duals
+        self.gap = gap
+
+
+class SolveControl:
+    # Limits for a single solve, and a way to stop it from another thread. The time limit is in seconds
+    # and the gap is the relative optimality gap at which a MIP is considered solved, None keeps the
+    # default of the solver.
+    def __init__(self, time_limit: float | None = None, gap: float | None = None) -> None:
+        self.time_limit = time_limit
+        self.gap = gap
+        self.__cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        self.__cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self.__cancelled.is_set()
+
+
+class SolverBackend(ABC):
+    @abstractmethod
+    def name(self) -> str:
+        pass
+
+    # Solves the presolved problem within the limits of the control, a solve that runs out of time or
+    # is cancelled has the status LpStatusNotSolved. A MIP that runs out of time is not solved either,
+    # even if the solver found an integer solution by then. Called from solver pool threads, so any state kept
+    # on the backend between solves must be thread safe.
+    @abstractmethod
+    def solve(self, problem: ReducedProblem, control: SolveControl) -> SolverSolution:
+        pass
+
+
+class CbcBackend(SolverBackend):
+    # Solves through pulp with the CBC command line solver, which writes the model to temporary files
+    # and runs CBC in a separate process. pulp gives no access to that process, so a solve can only be
+    # cancelled before it starts and is otherwise bounded by the time limit.
+    def name(self) -> str:
+        return "cbc"
+
+    def solve(self, problem: ReducedProblem, control: SolveControl) -> SolverSolution:
+        if control.is_cancelled():
+            return SolverSolution(LpStatusNotSolved, [0.0] * problem.num_columns(), None)
+        prob, variables, constraints = problem.to_lp_problem(
+            "max-problem" if problem.is_maximize() else "min-problem"
+        )
+
+        # The MIP preprocessing of CBC can lose precision on the fractional recipe coefficients and turn
+        # an optimal solution into a worse one while undoing it.
+        options = ["preprocess off"] if problem.is_mip() else []
+        status = prob.solve(
+            PULP_CBC_CMD(msg=False, timeLimit=control.time_limit, gapRel=control.gap, options=options)
+        )
+        values = [variable.value() or 0 for variable in variables]
+        # pulp has no value for an empty objective.
+        objective_value = prob.objective.value() or 0.0
+        if problem.is_mip():
+            # CBC reports a MIP that stopped on the time limit with an integer solution as optimal.
+            if status is LpStatusOptimal and prob.sol_status != LpSolutionOptimal:
+                return SolverSolution(LpStatusNotSolved, [0.0] * problem.num_columns(), None)
+            # pulp does not read the gap back, but CBC only stops early once it is within the gap asked for.
+            return SolverSolution(status, values, objective_value, gap=control.gap)
+        row_duals = None
+        if status is LpStatusOptimal:
+            row_duals = [sum(constraint.pi or 0 for constraint in row_constraints) for row_constraints in constraints]
+        return SolverSolution(status, values, objective_value, row_duals)
+
+
+class HighsBackend(SolverBackend):
+    # Solves in-process with HiGHS directly from the reduced problem arrays, without building a pulp
+    # problem or touching the disk.
+    #
+    # The optimal basis of recent solves is kept for a short time, keyed by the shape of the reduced
+    # problem (which model columns and rows it contains). Queries that only differ from a recent one
+    # in bounds or in the objective, like the edits made from the result views, reduce to the same
+    # shape and are re-solved from that basis with the dual simplex method instead of from scratch.
+    # A MIP is always solved from scratch.
+    def __init__(self) -> None:
+        import highspy
+        self.__highspy = highspy
+        self.__bases: ResultCache = ResultCache(
+            int(os.getenv("ADA_WARM_START_SIZE", 64)), float(os.getenv("ADA_WARM_START_TTL", 300))
+        )
+        self.__bases_lock = threading.Lock()
+
+    def name(self) -> str:
+        return "highs"
+
+    def __status(self, highs) -> int:
+        model_status = highs.getModelStatus()
+        statuses = self.__highspy.HighsModelStatus
+        if model_status == statuses.kOptimal:
+            return LpStatusOptimal
+        if model_status == statuses.kInfeasible:
+            return LpStatusInfeasible
+        if model_status == statuses.kUnbounded:
+            return LpStatusUnbounded
+        if model_status in (statuses.kNotset, statuses.kTimeLimit, statuses.kInterrupt):
+            return LpStatusNotSolved
+        return LpStatusUndefined
+
+    def solve(self, problem: ReducedProblem, control: SolveControl) -> SolverSolution:
+        highspy = self.__highspy
+
+        lp = highspy.HighsLp()
+        lp.num_col_ = problem.num_columns()
+        lp.num_row_ = problem.num_rows()
+        lp.col_cost_ = problem.cost()
+        lp.col_lower_ = problem.col_lower()
+        lp.col_upper_ = problem.col_upper()
+        lp.row_lower_ = problem.row_lower()
+        lp.row_upper_ = problem.row_upper()
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = problem.row_starts()
+        lp.a_matrix_.index_ = problem.row_cols()
+        lp.a_matrix_.value_ = problem.row_coeffs()
+        lp.sense_ = highspy.ObjSense.kMaximize if problem.is_maximize() else highspy.ObjSense.kMinimize
+        if problem.is_mip():
+            lp.integrality_ = [
+                highspy.HighsVarType.kInteger if integer else highspy.HighsVarType.kContinuous
+                for integer in problem.integrality()
+            ]
+
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", False)
+        if control.time_limit is not None:
+            highs.setOptionValue("time_limit", float(control.time_limit))
+        if control.gap is not None:
+            highs.setOptionValue("mip_rel_gap", float(control.gap))
+        highs.passModel(lp)
+
+        # HiGHS polls the interrupt callbacks while it solves, which stops it soon after a cancel.
+        def interrupt(_callback_type, _message, _data_out, data_in, _user_data) -> None:
+            if control.is_cancelled():
+                data_in.user_interrupt = True
+
+        highs.setCallback(interrupt, None)
+        for callback_type in (
+                highspy.cb.HighsCallbackType.kCallbackSimplexInterrupt,
+                highspy.cb.HighsCallbackType.kCallbackIpmInterrupt,
+                highspy.cb.HighsCallbackType.kCallbackMipInterrupt,
+        ):
+            highs.startCallback(callback_type)
+
+        shape = (tuple(problem.columns()), tuple(problem.rows()))
+        basis = None
+        if not problem.is_mip():
+            with self.__bases_lock:
+                basis = self.__bases.get(shape)
+        if basis is not None and highs.setBasis(basis) == highspy.HighsStatus.kOk:
+            highs.setOptionValue("presolve", "off")
+            highs.setOptionValue("solver", "simplex")
+            highs.setOptionValue("simplex_strategy", 1)  # Dual simplex
+        highs.run()
+        if (
+                highs.getModelStatus() == highspy.HighsModelStatus.kUnboundedOrInfeasible
+                and not control.is_cancelled()
+        ):
+            # Presolve cannot always tell the two apart, solving without it gives a definite answer.
+            highs.setOptionValue("presolve", "off")
+            highs.run()
+
+        status = self.__status(highs)
+        if status is not LpStatusOptimal:
+            return SolverSolution(status, [0.0] * problem.num_columns(), None)
+        # Round to the precision of CBC solution files so both backends report the same values rather
+        # than floating point noise like 1879.9999999999998.
+        solution = highs.getSolution()
+        if problem.is_mip():
+            return SolverSolution(
+                status,
+                [float(f"{value:.8g}") for value in solution.col_value],
+                float(f"{highs.getInfo().objective_function_value:.8g}"),
+                gap=max(0.0, highs.getInfo().mip_gap),
+            )
+        basis = highs.getBasis()
+        if basis.valid:
+            with self.__bases_lock:
+                self.__bases.put(shape, basis)
+        return SolverSolution(
+            status,
+            [float(f"{value:.8g}") for value in solution.col_value],
+            float(f"{highs.getInfo().objective_function_value:.8g}"),
+            list(solution.row_dual) if solution.dual_valid else None,
+        )
+
+
+def create_backend(name: str | None = None) -> SolverBackend:
+    if name is None:
+        name = os.getenv("ADA_SOLVER_BACKEND", "highs")
+    name = name.lower()
+    if name == "cbc":
+        return CbcBackend()
+    if name == "highs":
+        try:
+            return HighsBackend()
+        except ImportError:
+            print("HiGHS is not available, falling back to the CBC solver")
+            return CbcBackend()
+    raise ValueError(f"Unknown solver backend '{name}', expected 'highs' or 'cbc'")
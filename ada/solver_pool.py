@@ -0,0 +1,79 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SolverPoolFullException(Exception):
+    pass
+
+
+class SolverPool:
+    # Runs blocking solver calls on worker threads so that the event loop stays responsive while a
+    # solve is in progress. At most 'workers' solves run at the same time and at most 'max_queued'
+    # more may wait for a worker, anything beyond that is rejected with SolverPoolFullException.
+    def __init__(self, workers: int | None = None, max_queued: int | None = None) -> None:
+        if workers is None:
+            workers = int(os.getenv("ADA_SOLVER_WORKERS", min(4, os.cpu_count() or 1)))
+        if max_queued is None:
+            max_queued = int(os.getenv("ADA_SOLVER_MAX_QUEUED", 32))
+        self.__workers = max(1, workers)
+        self.__max_queued = max(0, max_queued)
+        self.__executor = ThreadPoolExecutor(max_workers=self.__workers, thread_name_prefix="ada-solver")
+        self.__lock = threading.Lock()
+        self.__pending = 0
+
+    def workers(self) -> int:
+        return self.__workers
+
+    def max_queued(self) -> int:
+        return self.__max_queued
+
+    def pending(self) -> int:
+        return self.__pending
+
+    def __acquire(self) -> None:
+        with self.__lock:
+            if self.__pending >= self.__workers + self.__max_queued:
+                raise SolverPoolFullException(
+                    "Too many optimization queries are being processed right now, please try again shortly."
+                )
+            self.__pending += 1
+
+    def __release(self) -> Callable[..., None]:
+        released = False
+
+        def release(*_args) -> None:
+            nonlocal released
+            with self.__lock:
+                if not released:
+                    released = True
+                    self.__pending -= 1
+
+        return release
+
+    # Runs func(*args) on a worker thread. If the caller is cancelled while waiting, e.g. because its
+    # deadline passed, the slot of the call is freed right away and 'on_cancel' is called so that a
+    # call that is already running can stop early, its result is discarded either way.
+    async def run(self, func: Callable[..., T], *args, on_cancel: Callable[[], None] | None = None) -> T:
+        self.__acquire()
+        release = self.__release()
+        try:
+            future = self.__executor.submit(func, *args)
+        except BaseException:
+            release()
+            raise
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if on_cancel is not None:
+                on_cancel()
+            release()
+            raise
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
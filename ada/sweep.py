@@ -0,0 +1,241 @@
+import math
+from typing import Callable, cast
+
+import tabulate
+
+from .optimization_query import OptimizationQuery
+from .optimizer import OptimizationResult, Optimizer
+from .result import ErrorResult, Result
+
+# Number of intervals a range without a step is divided into.
+DEFAULT_INTERVALS = 64
+
+
+class SweepPoint:
+    # The objective value at one amount of the swept range. The value is None if the query has no
+    # solution at that amount, 'solved' is False if it was interpolated instead of solved.
+    def __init__(self, amount: float, value: float | None, solved: bool) -> None:
+        self.amount = amount
+        self.value = value
+        self.solved = solved
+
+
+class SweepResult(Result):
+    def __init__(
+            self,
+            query: OptimizationQuery,
+            points: list[SweepPoint],
+            breakpoints: list[SweepPoint],
+            solve_count: int,
+            show_every_point: bool,
+    ) -> None:
+        self.__query = query
+        self.__points = points
+        self.__breakpoints = breakpoints
+        self.__solve_count = solve_count
+        self.__show_every_point = show_every_point
+
+    def query(self) -> OptimizationQuery:
+        return self.__query
+
+    def points(self) -> list[SweepPoint]:
+        return self.__points
+
+    # Points where the objective value changes slope, i.e. where the optimal production chain changes,
+    # or where the query starts or stops having a solution.
+    def breakpoints(self) -> list[SweepPoint]:
+        return self.__breakpoints
+
+    def solve_count(self) -> int:
+        return self.__solve_count
+
+    # Every step is shown for ranges with a step, only the ends and the breakpoints otherwise.
+    def table_points(self) -> list[SweepPoint]:
+        if self.__show_every_point:
+            return self.__points
+        points = {point.amount: point for point in [self.__points[0], *self.__breakpoints, self.__points[-1]]}
+        return sorted(points.values(), key=lambda point: point.amount)
+
+    def objective_name(self) -> str:
+        objective = self.__query.objective()
+        return objective.var if objective is not None else "objective"
+
+    def table(self) -> str:
+        rows = []
+        previous = None
+        for point in self.table_points():
+            marginal = ""
+            if previous is not None and previous.value is not None and point.value is not None:
+                marginal = _format((point.value - previous.value) / (point.amount - previous.amount), 4)
+            rows.append([
+                _format(point.amount),
+                "infeasible" if point.value is None else _format(point.value),
+                marginal,
+            ])
+            previous = point
+        return tabulate.tabulate(
+            rows,
+            headers=[self.__query.range_element().var, self.objective_name(), "marginal"],
+            tablefmt="simple",
+            disable_numparse=True,
+        )
+
+    def __str__(self) -> str:
+        breakpoints = ", ".join(_format(point.amount) for point in self.__breakpoints) or "none"
+        return (
+            f"{self.table()}\n\n"
+            f"Breakpoints: {breakpoints}\n"
+            f"Solved {self.__solve_count} times for {len(self.__points)} amounts"
+        )
+
+
+def _format(value: float, digits: int = 2) -> str:
+    return str(round(float(value), digits))
+
+
+class ParametricSweeper:
+    # Solves an optimization query over a range of amounts for one of its inputs or outputs.
+    #
+    # The optimal objective value of an LP is a piecewise linear function of the amount, concave when
+    # maximizing and convex when minimizing, so if it lies on the line between the two ends of an
+    # interval at its midpoint it lies on that line across the whole interval. The range is bisected
+    # until every interval is either linear or a single step wide, solving all midpoints of a round as
+    # one batch, and the points inside a linear interval are interpolated instead of solved.
+    #
+    # Breakpoints are found from the solved points: where two lines that are each confirmed by three or
+    # more points meet, or where the lines on both sides of a single step intersect, which is confirmed
+    # with one more solve.
+    def __init__(self, opt: Optimizer) -> None:
+        self.__opt = opt
+
+    async def __solve(self, query: OptimizationQuery, amounts: list[float]) -> list[float | None] | ErrorResult:
+        results = await self.__opt.optimize_many([query.with_amount(amount) for amount in amounts])
+        values = []
+        for result in results:
+            if isinstance(result, ErrorResult):
+                return result
+            result = cast(OptimizationResult, result)
+            values.append(result.solution().objective_value() if result.success() else None)
+        return values
+
+    async def sweep(self, query: OptimizationQuery) -> Result:
+        range_value = query.range_element().value
+        if range_value.step:
+            amounts = range_value.amounts()
+        else:
+            width = (range_value.stop - range_value.start) / DEFAULT_INTERVALS
+            amounts = [range_value.start + width * index for index in range(DEFAULT_INTERVALS)]
+            amounts.append(range_value.stop)
+
+        # Index into amounts => objective value, None if there is no solution.
+        values: dict[int, float | None] = {}
+        last = len(amounts) - 1
+        pending = [(0, last)]
+        indices = [0, last]
+        while indices:
+            solved = await self.__solve(query, [amounts[index] for index in indices])
+            if isinstance(solved, ErrorResult):
+                return solved
+            values.update(zip(indices, solved))
+            next_pending = []
+            for low, high in pending:
+                if high - low <= 1:
+                    continue
+                middle = (low + high) // 2
+                if middle not in values:
+                    next_pending.append((low, high))
+                elif self.__is_linear(
+                        amounts[low], values[low], amounts[middle], values[middle], amounts[high], values[high]
+                ):
+                    continue
+                elif values[low] is None and values[middle] is None and values[high] is None:
+                    # The amounts with a solution form a single interval, assume it is not in here.
+                    continue
+                else:
+                    next_pending.extend([(low, middle), (middle, high)])
+            pending = next_pending
+            indices = [(low + high) // 2 for low, high in pending if (low + high) // 2 not in values]
+        solve_count = len(values)
+
+        points = [SweepPoint(amount, values.get(index), index in values) for index, amount in enumerate(amounts)]
+        solved = [points[index] for index in sorted(values)]
+        feasible = [point for point in solved if point.value is not None]
+
+        # Every amount that was not solved is either inside a linear interval or without a solution.
+        for previous, point in zip(feasible, feasible[1:]):
+            for index in range(amounts.index(previous.amount) + 1, amounts.index(point.amount)):
+                points[index].value = _line(previous, point)(amounts[index])
+
+        breakpoints = []
+        if feasible and feasible[0] is not solved[0]:
+            breakpoints.append(feasible[0])
+        if feasible and feasible[-1] is not solved[-1]:
+            breakpoints.append(feasible[-1])
+
+        # Runs of solved points on a single line, a run of only two points is a single unconfirmed step.
+        runs = [feasible[:2]] if feasible else []
+        for point in feasible[2:]:
+            run = runs[-1]
+            if self.__is_linear(
+                    run[-2].amount, run[-2].value, run[-1].amount, run[-1].value, point.amount, point.value
+            ):
+                run.append(point)
+            else:
+                runs.append([run[-1], point])
+
+        candidates = []
+        for index, run in enumerate(runs):
+            previous = runs[index - 1] if index > 0 else None
+            following = runs[index + 1] if index + 1 < len(runs) else None
+            if len(run) < 2:
+                continue
+            if len(run) > 2:
+                if previous is not None and len(previous) > 2:
+                    breakpoints.append(run[0])
+                continue
+            if previous is not None and following is not None and len(previous) > 2 and len(following) > 2:
+                left = _line(previous[0], previous[-1])
+                right = _line(following[0], following[-1])
+                slope_difference = (left(1) - left(0)) - (right(1) - right(0))
+                if slope_difference != 0:
+                    amount = (right(0) - left(0)) / slope_difference
+                    if run[0].amount < amount < run[-1].amount:
+                        candidates.append((run, SweepPoint(amount, left(amount), True)))
+                        continue
+            if previous is not None:
+                breakpoints.append(run[0])
+            if following is not None:
+                breakpoints.append(run[-1])
+
+        candidate_values = await self.__solve(query, [candidate.amount for _, candidate in candidates])
+        if isinstance(candidate_values, ErrorResult):
+            return candidate_values
+        solve_count += len(candidates)
+        for (run, candidate), value in zip(candidates, candidate_values):
+            if value is not None and math.isclose(value, candidate.value, rel_tol=1e-6, abs_tol=1e-6):
+                breakpoints.append(candidate)
+            else:
+                # There is more than one breakpoint within the step.
+                breakpoints.extend(run)
+
+        breakpoints = sorted({point.amount: point for point in breakpoints}.values(), key=lambda point: point.amount)
+        return SweepResult(query, points, breakpoints, solve_count, show_every_point=bool(range_value.step))
+
+    @staticmethod
+    def __is_linear(
+            low: float,
+            low_value: float | None,
+            middle: float,
+            middle_value: float | None,
+            high: float,
+            high_value: float | None,
+    ) -> bool:
+        if low_value is None or middle_value is None or high_value is None:
+            return False
+        expected = low_value + (high_value - low_value) * (middle - low) / (high - low)
+        return math.isclose(middle_value, expected, rel_tol=1e-6, abs_tol=1e-6)
+
+
+def _line(start: SweepPoint, end: SweepPoint) -> Callable[[float], float]:
+    slope = (end.value - start.value) / (end.amount - start.amount)
+    return lambda amount: start.value + slope * (amount - start.amount)
@@ -0,0 +1,114 @@
+import atexit
+import glob
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+
+from pulp import LpStatus
+
+from .presolve import ReducedProblem
+
+
+class SolveTrace:
+    def __init__(
+            self,
+            query: str,
+            backend: str,
+            status: int,
+            problem: ReducedProblem,
+            timings: dict[str, float],
+    ) -> None:
+        self.query = query
+        self.backend = backend
+        self.status = status
+        self.problem = problem
+        self.timings = timings
+        self.created = time.time()
+
+    def render(self) -> str:
+        lines = [
+            f"Query: {self.query}",
+            f"Time: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.created))}",
+            f"Backend: {self.backend}",
+            f"Status: {LpStatus.get(self.status, self.status)}",
+            f"Columns: {self.problem.num_columns()}/{self.problem.instance().model().num_columns()}",
+            f"Rows: {self.problem.num_rows()}/{self.problem.instance().model().num_rows()}",
+        ]
+        for name, seconds in self.timings.items():
+            lines.append(f"Timing {name}: {seconds * 1000:.3f}ms")
+        prob, _, _ = self.problem.to_lp_problem("max-problem" if self.problem.is_maximize() else "min-problem")
+        lines.append("")
+        lines.append(str(prob))
+        return "\n".join(lines) + "\n"
+
+
+class TraceRecorder:
+    # Records solver traces for debugging. A solve is traced when its query asks for it or, at random,
+    # for a 'sample_rate' fraction of all solves. Traces are rendered and written by a background thread
+    # into uniquely named files in 'directory', keeping only the 'max_files' most recent ones. Nothing is
+    # started or computed while tracing is not used.
+    def __init__(
+            self,
+            sample_rate: float | None = None,
+            directory: str | None = None,
+            max_files: int | None = None,
+    ) -> None:
+        if sample_rate is None:
+            sample_rate = float(os.getenv("ADA_TRACE_SAMPLE_RATE", 0))
+        if directory is None:
+            directory = os.getenv("ADA_TRACE_DIR", "output" + os.path.sep + "traces")
+        if max_files is None:
+            max_files = int(os.getenv("ADA_TRACE_MAX_FILES", 100))
+        self.__sample_rate = sample_rate
+        self.__directory = directory
+        self.__max_files = max(1, max_files)
+        self.__lock = threading.Lock()
+        self.__queue: queue.Queue[SolveTrace] | None = None
+        self.__files: deque[str] = deque()
+
+    def should_trace(self, requested: bool = False) -> bool:
+        return requested or (self.__sample_rate > 0 and random.random() < self.__sample_rate)
+
+    def record(self, trace: SolveTrace) -> None:
+        with self.__lock:
+            if self.__queue is None:
+                self.__queue = queue.Queue()
+                threading.Thread(target=self.__write_traces, name="ada-trace-writer", daemon=True).start()
+                # Write out the remaining traces before the interpreter exits.
+                atexit.register(self.flush)
+        self.__queue.put(trace)
+
+    # Blocks until every recorded trace has been written.
+    def flush(self) -> None:
+        if self.__queue is not None:
+            self.__queue.join()
+
+    def __write_traces(self) -> None:
+        os.makedirs(self.__directory, exist_ok=True)
+        existing = glob.glob(os.path.join(self.__directory, "trace-*.txt"))
+        self.__files.extend(sorted(existing, key=os.path.getmtime))
+        while True:
+            trace = self.__queue.get()
+            try:
+                self.__write(trace)
+            except Exception as exception:
+                print(f"Failed to write solver trace: {exception}")
+            finally:
+                self.__queue.task_done()
+
+    def __write(self, trace: SolveTrace) -> None:
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.created))
+        filename = os.path.join(self.__directory, f"trace-{timestamp}-{uuid.uuid4().hex[:8]}.txt")
+        with open(filename, "w") as f:
+            f.write(trace.render())
+        self.__files.append(filename)
+        while len(self.__files) > self.__max_files:
+            oldest = self.__files.popleft()
+            try:
+                os.remove(oldest)
+            except FileNotFoundError:
+                pass
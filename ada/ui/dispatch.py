@@ -1,4 +1,7 @@
+import asyncio
+import os
 from abc import ABC, abstractmethod
+from typing import Awaitable
 
 import discord
 
@@ -39,22 +42,40 @@ class Dispatch(ABC):
     async def replace(self, result: Result, breadcrumbs: Breadcrumbs, interaction: discord.Interaction):
         pass
 
+    # Discord only accepts a response within a few seconds of an interaction. Waits for the result until
+    # then and cancels the query afterwards, so that its solves stop instead of running for nobody.
+    # Returns None if the deadline passed.
+    @staticmethod
+    async def _before_deadline(result: Awaitable[Result], query: str) -> Result | None:
+        timeout = float(os.getenv("ADA_INTERACTION_TIMEOUT", 3))
+        try:
+            return await asyncio.wait_for(result, timeout)
+        except asyncio.TimeoutError:
+            print(f"Abandoned query after {timeout}s, the interaction expired: {query}")
+            return None
+
     # Processes the raw query and sends a new message for the interaction
     async def query_and_send(self, raw_query: str, interaction: discord.Interaction):
-        result = await self.query(raw_query)
+        result = await self._before_deadline(self.query(raw_query), raw_query)
+        if result is None:
+            return
         breadcrumbs = Breadcrumbs.create(raw_query)
         await self.send(result, breadcrumbs, interaction)
 
     # Executes a parsed query and sends a new message for the interaction
     async def execute_and_send(self, query: Query, interaction: discord.Interaction):
-        result = await self.execute(query)
+        result = await self._before_deadline(self.execute(query), str(query))
+        if result is None:
+            return
         breadcrumbs = Breadcrumbs.create(str(query))
         await self.send(result, breadcrumbs, interaction)
 
     # Processes the query in the breadcrumbs and replaces the interaction message
     async def query_and_replace(self, breadcrumbs: Breadcrumbs, interaction: discord.Interaction):
         raw_query = breadcrumbs.current_page().query()
-        result = await self.query(raw_query)
+        result = await self._before_deadline(self.query(raw_query), raw_query)
+        if result is None:
+            return
         await self.replace(result, breadcrumbs, interaction)
 
     # Executes a parsed query and replaces the interaction message
@@ -64,5 +85,7 @@ class Dispatch(ABC):
             breadcrumbs: Breadcrumbs,
             interaction: discord.Interaction
     ):
-        result = await self.execute(query)
+        result = await self._before_deadline(self.execute(query), str(query))
+        if result is None:
+            return
         await self.replace(result, breadcrumbs, interaction)
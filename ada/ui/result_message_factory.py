@@ -25,6 +25,7 @@ from ..info import InfoResult
 from ..optimization_result_data import OptimizationResultData
 from ..optimizer import OptimizationResult
 from ..result import ErrorResult, Result
+from ..sweep import SweepResult
 
 
 # noinspection PyMethodParameters
@@ -112,6 +113,9 @@ class ResultMessageFactory:
             sections.append("**Recipes**\n" + "\n".join(recipes))
         if len(buildings) > 0:
             sections.append("**Buildings**\n" + "\n".join(buildings))
+        note = result.whole_buildings_note()
+        if note is not None:
+            sections.append(f"*{note}*")
 
         # descriptions = []
         description = ""
@@ -169,6 +173,24 @@ class ResultMessageFactory:
         message.view = CompareRecipesForView(query.include_alternates(), dispatch)
         return message
 
+    @multimethod
+    def _from_result(result: SweepResult, breadcrumbs: Breadcrumbs, dispatch: Dispatch) -> ResultMessage:
+        breadcrumbs.current_page().replace_query(str(result.query()))
+        message = ResultMessage(breadcrumbs)
+        message.embed = None
+        breakpoints = ", ".join(str(round(float(point.amount), 2)) for point in result.breakpoints()) or "none"
+        out = [
+            "**Sweep:**",
+            f"```\n{result.table()}```",
+            f"**Breakpoints:** {breakpoints}",
+            f"*Solved {result.solve_count()} times for {len(result.points())} amounts, the optimum is linear "
+            f"between breakpoints.*",
+        ]
+        message.content = "\n".join(out)
+        if len(message.content) > 2000:
+            message.content = "Output was too long"
+        return message
+
     @staticmethod
     @multimethod
     def _from_result(result: CompareRecipeResult, breadcrumbs: Breadcrumbs, dispatch: Dispatch) -> ResultMessage:
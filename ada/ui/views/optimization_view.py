@@ -271,14 +271,28 @@ class InputCategoryView(OptimizationSelectorView):
 
         input_name = ""
         amount = 0
+        shadow_price = None
 
         data = self.try_get_data()
         if data:
             input, amount = data.inputs()[selected]
             input_name = input.human_readable_name()
+            if data.has_sensitivity():
+                shadow_price = data.shadow_prices().get(selected, 0)
 
         self.add_item(InfoButton(label=input_name, custom_id="input_info", dispatch=self.dispatch()))
 
+        # How much the objective would change with one more of this input, taken from the same solve.
+        if shadow_price is not None:
+            self.add_item(
+                discord.ui.Button(
+                    label=f"Objective per extra 1/m: {round(shadow_price, 2):+}",
+                    style=discord.ButtonStyle.secondary,
+                    custom_id="input_shadow_price",
+                    disabled=True
+                )
+            )
+
         # self.add_item(
         #     discord.ui.Button(
         #         label=str(amount),
@@ -390,14 +404,28 @@ class RecipesCategoryView(OptimizationSelectorView):
 
         recipe_name = ""
         amount = 0
+        reduced_cost = None
 
         data = self.try_get_data()
         if data:
             recipe, amount = data.recipes()[selected]
             recipe_name = recipe.human_readable_name()
+            if data.has_sensitivity():
+                reduced_cost = data.reduced_costs().get(selected, 0)
 
         self.add_item(InfoButton(label=recipe_name, custom_id="recipe_info", dispatch=self.dispatch()))
 
+        # How much the objective would change by forcing one more run of this recipe.
+        if reduced_cost is not None:
+            self.add_item(
+                discord.ui.Button(
+                    label=f"Objective per extra recipe: {round(reduced_cost, 2):+}",
+                    style=discord.ButtonStyle.secondary,
+                    custom_id="recipe_reduced_cost",
+                    disabled=True
+                )
+            )
+
         # self.__amount_button = discord.ui.Button(
         #     label=str(amount),
         #     style=discord.ButtonStyle.secondary,
@@ -483,6 +511,15 @@ class SettingsCategoryView(OptimizationCategoryView):
         self.__byproducts_button.callback = self.on_byproducts
         self.add_item(self.__byproducts_button)
 
+        whole_buildings = query.whole_buildings()
+        self.__whole_buildings_button = discord.ui.Button(
+            label="Allow Partial Buildings" if whole_buildings else "Use Whole Buildings",
+            style=discord.ButtonStyle.danger if whole_buildings else discord.ButtonStyle.success,
+            custom_id="settings_whole_buildings"
+        )
+        self.__whole_buildings_button.callback = self.on_whole_buildings
+        self.add_item(self.__whole_buildings_button)
+
         # TODO: Add button for allowing byproducts
 
     async def on_alternate_recipes(self, interaction: discord.Interaction):
@@ -515,3 +552,16 @@ class SettingsCategoryView(OptimizationCategoryView):
         query.set_strict_outputs(not query.is_strict_outputs())
         breadcrumbs.add_page(Breadcrumbs.Page(str(query), breadcrumbs.current_page().custom_ids()))
         await self.dispatch().execute_and_replace(query, breadcrumbs, interaction)
+
+    async def on_whole_buildings(self, interaction: discord.Interaction):
+        breadcrumbs = Breadcrumbs.extract(interaction.message.content)
+        raw_query = breadcrumbs.current_page().query()
+        try:
+            query = self.dispatch().parse(raw_query)
+        except QueryParseException as parse_exception:
+            print(f"Failed to parse {raw_query}: {parse_exception}")
+            return
+        query = cast(OptimizationQuery, query)
+        query.set_whole_buildings(not query.whole_buildings())
+        breadcrumbs.add_page(Breadcrumbs.Page(str(query), breadcrumbs.current_page().custom_ids()))
+        await self.dispatch().execute_and_replace(query, breadcrumbs, interaction)
@@ -19,6 +19,7 @@ class Bot(commands.Bot):
             intents=intents,
         )
         self.sync = os.getenv('SYNC_COMMANDS', 'false').lower() == 'true'
+        self.ada: Ada | None = None
         self.guild = None
         restrict_slash_commands_to_guild = os.getenv("RESTRICT_SLASH_COMMANDS_TO_GUILD")
         print(restrict_slash_commands_to_guild)
@@ -38,7 +39,8 @@ class Bot(commands.Bot):
         guilds = discord.utils.MISSING
         if self.guild:
             guilds = [self.guild]
-        await self.add_cog(AdaCog(self, Ada()), guilds=guilds)
+        self.ada = Ada()
+        await self.add_cog(AdaCog(self, self.ada), guilds=guilds)
         if self.sync:
             if self.guild:
                 print(f"Syncing commands to guild {self.guild}")
@@ -96,4 +98,16 @@ async def sync(
     await ctx.send(f"Synced the tree to {ret}/{len(guilds)}.")
 
 
+# @bot reload -> rebuilds the game data from Docs.json and swaps it in without a restart
+@bot.command("reload")
+@commands.guild_only()
+@commands.is_owner()
+async def reload(ctx: commands.Context) -> None:
+    if ctx.bot.ada is None:
+        await ctx.send("ADA is not loaded yet.")
+        return
+    await ctx.send("Reloading game data...")
+    await ctx.send(await ctx.bot.ada.reload())
+
+
 bot.run()
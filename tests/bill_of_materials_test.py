@@ -0,0 +1,62 @@
+import math
+
+from ada.db.db import DB
+
+# Compares the bill of materials of every item with one expanded recipe by recipe from the default recipes,
+# for items whose default recipes do not form a cycle.
+
+
+def expand(
+        db: DB, defaults: dict[str, str], item_var: str, visiting: set[str]
+) -> tuple[dict[str, float], float] | None:
+    if item_var not in defaults:
+        return {item_var: 1.0}, 0.0
+    if item_var in visiting:
+        return None
+    recipe = db.recipes()[defaults[item_var]]
+    product = recipe.product(item_var)
+    resources = {}
+    power = recipe.crafter().power_consumption() / product.minute_rate()
+    for ingredient_var, ingredient in recipe.ingredients().items():
+        bill = expand(db, defaults, ingredient_var, visiting | {item_var})
+        if bill is None:
+            return None
+        ingredient_resources, ingredient_power = bill
+        amount = ingredient.amount() / product.amount()
+        for resource_var, resource_amount in ingredient_resources.items():
+            resources[resource_var] = resources.get(resource_var, 0.0) + amount * resource_amount
+        power += amount * ingredient_power
+    return resources, power
+
+
+def amounts(bill: dict) -> dict[str, float]:
+    return {var: amount for var, (_, amount) in bill.items()}
+
+
+if __name__ == "__main__":
+    db = DB()
+    bill_of_materials = db.bill_of_materials()
+    defaults = bill_of_materials.default_recipes()
+
+    modular_frame = db.items()["item:modular-frame"]
+    print(amounts(modular_frame.raw_resources()), modular_frame.production_power())
+    assert amounts(modular_frame.raw_resources()) == {"item:iron-ore": 24.0}
+    assert amounts(db.items()["item:iron-rod"].raw_resources()) == {"item:iron-ore": 1.0}
+    assert amounts(db.items()["item:screw"].raw_resources()) == {"item:iron-ore": 0.25}
+    assert amounts(db.items()["item:iron-ore"].raw_resources()) == {"item:iron-ore": 1.0}
+    assert db.items()["item:iron-ore"].production_power() == 0
+
+    checked = 0
+    for item_var, item in db.items().items():
+        expected = expand(db, defaults, item_var, set())
+        if expected is None:
+            continue
+        expected_resources, expected_power = expected
+        assert bill_of_materials.has_bill(item_var), item_var
+        resources = amounts(item.raw_resources())
+        assert resources.keys() == {var for var, amount in expected_resources.items() if amount != 0}, item_var
+        for resource_var, amount in resources.items():
+            assert math.isclose(amount, expected_resources[resource_var], rel_tol=1e-9), (item_var, resource_var)
+        assert math.isclose(item.production_power(), expected_power, rel_tol=1e-9, abs_tol=1e-9), item_var
+        checked += 1
+    print(f"Checked the bill of materials of {checked}/{len(db.items())} items")
@@ -0,0 +1,50 @@
+import json
+import pickle
+import pkgutil
+import statistics
+import sys
+import time
+import tracemalloc
+
+from ada.db.db import DB
+
+# Times every step of loading the game data: reading Docs.json, parsing the JSON, building the DB and
+# pickling and unpickling it as the DB snapshot does, and the peak memory allocated while building the DB.
+# Run with the number of repeats, e.g.
+#   python tests/db_load_benchmark.py 20
+
+
+def measure(repeats: int, step) -> list[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        step()
+        timings.append(1000 * (time.perf_counter() - start))
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    print(f"{name:<16} median {statistics.median(timings):8.1f} ms   min {min(timings):8.1f} ms")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    raw = pkgutil.get_data("ada.data", "Docs.json")
+    db = DB(raw)
+    snapshot = pickle.dumps(db, protocol=pickle.HIGHEST_PROTOCOL)
+    print(
+        f"Docs.json: {len(raw)} bytes, {len(db.items())} items, {len(db.recipes())} recipes,"
+        f" snapshot {len(snapshot)} bytes"
+    )
+
+    report("read", measure(repeats, lambda: pkgutil.get_data("ada.data", "Docs.json")))
+    report("parse json", measure(repeats, lambda: json.loads(raw)))
+    report("build DB", measure(repeats, lambda: DB(raw)))
+    report("dump snapshot", measure(repeats, lambda: pickle.dumps(db, protocol=pickle.HIGHEST_PROTOCOL)))
+    report("load snapshot", measure(repeats, lambda: pickle.loads(snapshot)))
+
+    tracemalloc.start()
+    DB(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'build DB peak':<16} {peak / 1e6:8.1f} MB")
@@ -0,0 +1,59 @@
+import json
+import pkgutil
+
+from ada.db.db import NATIVE_CLASSES
+from ada.db.docs_reader import native_class_name, read_native_classes
+
+# Reads Docs.json with the streaming reader and with json.loads, both have to give the same classes for the
+# native classes that are asked for.
+
+
+def expected(raw: bytes, names: set[str]) -> list[tuple[str, list[dict]]]:
+    native_classes = []
+    for native_class in json.loads(raw):
+        name = native_class_name(native_class["NativeClass"])
+        if name in names:
+            native_classes.append((name, native_class["Classes"]))
+    return native_classes
+
+
+def check(raw: bytes, names: set[str]) -> None:
+    native_classes = list(read_native_classes(raw, names))
+    assert native_classes == expected(raw, names), names
+    print(f"{len(raw)} bytes: read {len(native_classes)} of {len(names)} native classes")
+
+
+if __name__ == "__main__":
+    raw = pkgutil.get_data("ada.data", "Docs.json")
+    all_names = {native_class_name(native_class["NativeClass"]) for native_class in json.loads(raw)}
+
+    check(raw, set(NATIVE_CLASSES))
+    check(raw, all_names)
+    check(raw, set())
+    # Docs.json ships as UTF-16 with a byte order mark.
+    check(raw.decode("utf-8").encode("utf-16"), set(NATIVE_CLASSES))
+
+    classes = '[{"ClassName": "Desc_A_C", "mDisplayName": "A \\u00e9 [1]", "mList": [[], {}, "]"]}]'
+    check(b"[]", set(NATIVE_CLASSES))
+    check(
+        b' [ {"NativeClass": "Class\'/Script/FactoryGame.FGItemDescriptor\'" , "Classes" : [ ] } ] ',
+        {"FGItemDescriptor"},
+    )
+    # The classes can come before the native class.
+    check(
+        f'[{{"Classes": {classes}, "NativeClass": "Class\'/Script/FactoryGame.FGItemDescriptor\'"}},'
+        f' {{"Classes": {classes}, "NativeClass": "Class\'/Script/FactoryGame.FGUnused\'"}}]'.encode(),
+        {"FGItemDescriptor"},
+    )
+    check(
+        f'[{{"NativeClass": "Class\'/Script/FactoryGame.FGUnused\'", "Classes": {classes}}},'
+        f' {{"NativeClass": "Class\'/Script/FactoryGame.FGItemDescriptor\'", "Classes": {classes}}}]'.encode(),
+        {"FGItemDescriptor"},
+    )
+
+    for malformed in [b"", b"[", b'[{"NativeClass": "x"', b"[{}", b'[{"Classes": [1 2]}]']:
+        try:
+            list(read_native_classes(malformed, {"x"}))
+        except ValueError:
+            continue
+        raise AssertionError(f"{malformed!r} was read")
@@ -0,0 +1,81 @@
+import math
+
+from pulp.constants import LpStatusOptimal
+
+from ada.compiled_model import ModelInstance
+from ada.db.db import DB
+from ada.optimizer import Optimizer
+from ada.presolve import ReducedProblem, presolve
+from ada.query_parser import QueryParser
+from ada.solver_backend import SolveControl, create_backend
+
+# Solves every query once from the presolved problem and once from the whole model, both have to agree on
+# the status and the objective value.
+
+
+def unpresolved(instance: ModelInstance) -> ReducedProblem:
+    model = instance.model()
+    return ReducedProblem(
+        instance,
+        [0.0] * model.num_columns(),
+        list(range(model.num_columns())),
+        list(range(model.num_rows())),
+        list(model.row_lower()),
+        list(model.row_upper()),
+        list(instance.col_lower()),
+        list(instance.col_upper()),
+        0.0,
+        False,
+    )
+
+
+if __name__ == "__main__":
+    db = DB()
+    parser = QueryParser(db)
+    opt = Optimizer(db)
+    backend = create_backend()
+
+    # Presolve divides by the coefficients of the rows.
+    assert 0 not in opt.model().row_coeffs()
+
+    tests_queries = [
+        "produce 60 iron rods",
+        "produce 60 iron rods from ? iron ore",
+        "produce ? iron rods from 60 iron ore",
+        "produce 10 modular frames",
+        "produce 10 modular frames from alternate recipes",
+        "produce 60 iron plate from ? weighted resources",
+        "produce ? power from 240 crude oil",
+        "produce ? power from 60 coal and water",
+        "produce 20 plastic",
+        "produce 20 plastic from only crude oil",
+        "produce only 20 plastic",
+        "produce 60 iron rods without refineries",
+        "produce 30 wire from alternate recipes and ? iron ore",
+        "produce 30 wire from 0 copper ore and alternate recipes",
+        "produce 50 modular frames from whole-buildings",
+        "produce ? modular frames from 20 constructors and whole-buildings",
+    ]
+
+    for raw_query in tests_queries:
+        instance = opt.instance(parser.parse(raw_query))
+        problem = presolve(instance)
+        full = backend.solve(unpresolved(instance), SolveControl())
+        if problem.is_infeasible():
+            print(f"{raw_query}: presolve infeasible, solver status {full.status}")
+            assert full.status != LpStatusOptimal, raw_query
+            continue
+        if problem.num_columns() == 0:
+            status, objective_value = LpStatusOptimal, problem.objective_offset()
+        else:
+            reduced = backend.solve(problem, SolveControl())
+            status, objective_value = reduced.status, reduced.objective_value
+            if status == LpStatusOptimal:
+                objective_value += problem.objective_offset()
+        print(
+            f"{raw_query}: {problem.num_columns()}/{instance.model().num_columns()} columns, status {status}"
+            f" and {full.status}, objective {objective_value} and {full.objective_value}"
+        )
+        assert status == full.status, raw_query
+        if status == LpStatusOptimal:
+            assert math.isclose(objective_value, full.objective_value, rel_tol=1e-6, abs_tol=1e-6), raw_query
@@ -0,0 +1,57 @@
+import math
+
+from pulp.constants import LpStatusOptimal
+
+from ada.db.db import DB
+from ada.optimizer import Optimizer
+from ada.presolve import presolve
+from ada.query_parser import QueryParser
+from ada.solver_backend import SolveControl, create_backend
+
+# Expands every query the planner takes as a chain and solves it as an LP as well, both have to give the
+# same value for every column of the model. The other queries have to be left to the LP.
+
+if __name__ == "__main__":
+    db = DB()
+    parser = QueryParser(db)
+    opt = Optimizer(db)
+    backend = create_backend()
+    columns = opt.model().columns()
+
+    chain_queries = [
+        "produce 60 iron rods",
+        "produce 10 modular frames",
+        "produce 60 screws",
+        "produce 60 iron plate from ? weighted resources",
+        "produce 60 iron rods without refineries",
+    ]
+    lp_queries = [
+        "produce 60 iron rods from ? iron ore",
+        "produce ? iron rods from 60 iron ore",
+        "produce 10 modular frames from alternate recipes",
+        "produce ? power from 60 coal and water",
+        "produce only 20 plastic",
+        "produce 50 modular frames from whole-buildings",
+        "produce 60 screws then ? buildings",
+    ]
+
+    for raw_query in chain_queries + lp_queries:
+        query = parser.parse(raw_query)
+        instance = opt.instance(query)
+        problem = presolve(instance)
+        values = opt.planner().plan(query, instance, problem)
+        print(f"{raw_query}: {'chain' if values is not None else 'lp'}")
+        if raw_query in lp_queries:
+            assert values is None, raw_query
+            continue
+        assert values is not None, raw_query
+
+        solution = backend.solve(problem, SolveControl())
+        assert solution.status == LpStatusOptimal, raw_query
+        lp_values = problem.expand(solution.values)
+        for column, (value, lp_value) in enumerate(zip(values, lp_values)):
+            assert math.isclose(value, lp_value, rel_tol=1e-6, abs_tol=1e-6), (
+                raw_query, columns[column], value, lp_value
+            )
+
+    print(opt.planner().paths())
@@ -0,0 +1,61 @@
+import asyncio
+import math
+
+from pulp.constants import LpStatusOptimal
+
+from ada.db.db import DB
+from ada.optimizer import Optimizer
+from ada.presolve import presolve
+from ada.query_parser import QueryParser
+from ada.solver_backend import CbcBackend, HighsBackend, SolveControl
+
+
+async def main() -> None:
+    db = DB()
+    parser = QueryParser(db)
+    opt = Optimizer(db, backend=HighsBackend())
+    cbc_opt = Optimizer(db, backend=CbcBackend())
+
+    # Every recipe runs in its own whole buildings: 22.5 iron plates, 35 iron rods and 22.5 screws take
+    # 23 + 35 + 23 constructors, not the 80 of the fractional solution.
+    result = await opt.optimize(parser.parse("produce 50 modular frames from whole-buildings"))
+    print(result)
+    data = result.result_data()
+    assert result.success()
+    assert round(-data.crafters()["crafter:constructor"][1]) == 81
+    for crafter_var, (crafter, amount) in data.crafters().items():
+        needed = sum(
+            math.ceil(-value - 0.000001) for recipe, value in data.recipes().values() if recipe.crafter() is crafter
+        )
+        assert round(-amount) == needed, (crafter_var, amount, needed)
+
+    fractional = await opt.optimize(parser.parse("produce 50 modular frames"))
+    assert round(-fractional.result_data().crafters()["crafter:constructor"][1], 4) == 80
+
+    # 240 crude oil runs 13.33 fuel generators, so the last of 14 generators is partly idle and the whole
+    # building solution makes as much power as the fractional one. Both backends have to find it.
+    raw_query = "produce ? power from 240 crude oil and whole-buildings"
+    relaxation = await opt.optimize(parser.parse("produce ? power from 240 crude oil"))
+    bound = relaxation.solution().objective_value()
+    assert math.isclose(bound, 1880, rel_tol=1e-6)
+    for result in [await opt.optimize(parser.parse(raw_query)), await cbc_opt.optimize(parser.parse(raw_query))]:
+        print(result)
+        objective_value = result.solution().objective_value()
+        assert result.status() == LpStatusOptimal
+        assert math.isclose(objective_value, 1880, rel_tol=1e-6), objective_value
+        assert objective_value <= bound * (1 + 1e-6)
+        assert round(-result.result_data().generators()["generator:fuel-generator"][1], 4) == 14
+        # Both backends report the gap they proved, at most the gap they were asked to solve to.
+        assert result.mip_gap() is not None and result.mip_gap() <= 0.0001, result.mip_gap()
+        assert result.whole_buildings_note().startswith("Whole buildings within"), result.whole_buildings_note()
+
+    # Without a gap to solve to CBC cannot tell how close it got, so no note is shown.
+    instance = opt.instance(parser.parse(raw_query))
+    solution = CbcBackend().solve(presolve(instance), SolveControl())
+    assert solution.status == LpStatusOptimal and solution.gap is None
+    unknown_gap = opt.restore_result(parser.parse(raw_query), LpStatusOptimal, 1880.0, {"power": 1880.0})
+    assert unknown_gap.whole_buildings_note() is None
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -24,23 +24,45 @@ if DEBUG_PRINTS:
     sys.stdout = TracePrints()
 
 
+async def prewarm(ada: Ada, filename: str):
+    # Solves every query in the file, one per line, so that the results end up in the solution store.
+    with open(filename) as f:
+        raw_queries = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    results = await ada.query_many(raw_queries)
+    for raw_query, result in zip(raw_queries, results):
+        print(f"Pre-warmed {raw_query}: {type(result).__name__}")
+
+
 async def main():
     ada = Ada()
 
+    if len(sys.argv) == 3 and sys.argv[1] == "--prewarm":
+        await prewarm(ada, sys.argv[2])
+        return
+
+    args = sys.argv[1:]
+    trace = "--trace" in args
+    if trace:
+        args.remove("--trace")
+
     async def handle_query(raw_query):
-        result = await ada.query(raw_query)
+        result = await ada.query(raw_query, trace=trace)
         if isinstance(result, OptimizationResult) and result.has_solution():
-            result.generate_graph_viz("output/output.gv")
+            # Rendering calls out to graphviz, keep it off the event loop like the solver.
+            await asyncio.to_thread(result.generate_graph_viz, "output/output.gv")
         print(result)
 
-    if len(sys.argv) > 1:
-        await handle_query(" ".join(sys.argv[1:]))
+    if len(args) > 0:
+        await handle_query(" ".join(args))
         return
 
     while True:
-        raw_query = input()
+        raw_query = await asyncio.to_thread(input)
         if raw_query == "exit" or raw_query == "quit":
             return
+        if raw_query == "reload":
+            print(await ada.reload())
+            continue
         await handle_query(raw_query)
 
 